@@ -0,0 +1,1059 @@
+#!/usr/bin/env python3
+"""
+Lumonitor brightness backend
+Monitor discovery and brightness control via ddcutil/libddcutil and xrandr,
+kept free of GTK imports so the CLI and hotkey service start quickly
+"""
+
+import concurrent.futures
+import contextlib
+import ctypes
+import fcntl
+import glob
+import json
+import subprocess
+import os
+import re
+import select
+import signal
+import sys
+from typing import Callable, List, Dict, Optional
+from pathlib import Path
+import threading
+import time
+
+
+# MCCS VCP feature code for luminance
+VCP_BRIGHTNESS = 0x10
+
+# Brightness range accepted by set_brightness (dimmer risks a black screen)
+MIN_BRIGHTNESS = 0.1
+MAX_BRIGHTNESS = 1.0
+
+
+def clamp_brightness(value: float) -> float:
+    """Clamp a brightness level to the supported range at 1% resolution"""
+    return round(MIN_BRIGHTNESS if value < MIN_BRIGHTNESS else MAX_BRIGHTNESS if value > MAX_BRIGHTNESS else value, 2)
+
+
+def _same_percent(a: float, b: float) -> bool:
+    """True when two brightness levels round to the same whole percent"""
+    return round(a * 100) == round(b * 100)
+
+
+# ddcutil spends most of each call sleeping between DDC/CI packets
+DDCUTIL_SLEEP_MULTIPLIER = os.environ.get('LUMONITOR_DDC_SLEEP', '0.1')
+DDCUTIL_DETECT_COMMAND = ['ddcutil', '--sleep-multiplier', DDCUTIL_SLEEP_MULTIPLIER, 'detect']
+
+# Upper bounds (seconds) for one DDC/CI transaction and for waiting on a busy bus;
+# a wedged monitor must not hang every lumonitor process sharing its bus
+DDC_TIMEOUT = 10.0
+BUS_LOCK_TIMEOUT = 15.0
+
+# Persistent DDC/CI worker process, see ddc_helper.py
+HELPER_PATH = Path(__file__).resolve().with_name('ddc_helper.py')
+
+# Minimum seconds between rewrites of the per-monitor brightness files
+CACHE_FLUSH_INTERVAL = 0.2
+
+# Seconds a persisted ddcutil detect result is trusted
+MONITOR_CACHE_MAX_AGE = 3600
+
+# How long (seconds) memoized subprocess output stays valid
+READINESS_TTL = 30
+DISCOVERY_TTL = 5
+BRIGHTNESS_TTL = 2
+
+# ddcutil getvcp output: "... current value =    80, max value =   100"
+_VCP_RE = re.compile(rb'current value\s*=\s*(\d+),\s*max value\s*=\s*(\d+)')
+
+# ddcutil --version: "ddcutil 2.1.4"
+_DDCUTIL_VERSION_RE = re.compile(r'ddcutil\s+(\d+)\.')
+
+# ddcutil detect blocks: "Display N" ... "I2C bus: /dev/i2c-B" ... "Model: NAME"
+_DDC_DISPLAY_RE = re.compile(
+    rb'^Display\s+(\d+)\b((?:(?!^Display\s).)*?)^\s*Model:[ \t]*([^\n]*?)[ \t]*$', re.M | re.S)
+_I2C_BUS_RE = re.compile(rb'I2C bus:\s*/dev/i2c-(\d+)')
+
+# xrandr --listmonitors rows: " 0: +*eDP-1 1920/344x1080/193+0+0  eDP-1"
+_LISTMONITORS_RE = re.compile(rb'^\s*\d+:\s+\S+\s+\S+\s+(\S+)', re.M)
+
+# xrandr --verbose output blocks: "HDMI-1 connected ..." then indented "Brightness: 0.80"
+_XRANDR_BRIGHTNESS_RE = re.compile(
+    rb'^(\S+) connected[^\n]*\n(?:[ \t][^\n]*\n)*?[ \t]+Brightness:[ \t]*([\d.]+)', re.M)
+
+_run_cache = {}  # argv tuple -> (timestamp, CompletedProcess)
+_run_cache_lock = threading.Lock()
+
+
+def _spawn_collect(argv: List[str], text: bool = True, check: bool = True,
+                   timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    """Run argv through posix_spawn and collect its stdout (stderr is discarded)
+    
+    Unlike fork(), posix_spawn does not duplicate the parent's page tables,
+    which is noticeable once the GUI process has GTK loaded.
+    Raises subprocess.TimeoutExpired (after killing the child) past timeout.
+    """
+    if not hasattr(os, 'posix_spawnp'):
+        result = subprocess.run(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=text,
+                                timeout=timeout)
+    else:
+        read_fd, write_fd = os.pipe()
+        try:
+            pid = os.posix_spawnp(argv[0], argv, os.environ, file_actions=[
+                (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+                (os.POSIX_SPAWN_DUP2, write_fd, 1),
+                (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+            ])
+        except OSError:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        
+        deadline = None if timeout is None else time.monotonic() + timeout
+        chunks = []
+        with os.fdopen(read_fd, 'rb', buffering=0) as stream:
+            while True:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and (remaining <= 0 or not select.select([stream], [], [], remaining)[0]):
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    raise subprocess.TimeoutExpired(argv, timeout)
+                chunk = stream.read(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        stdout = b''.join(chunks)
+        _, status = os.waitpid(pid, 0)
+        returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        result = subprocess.CompletedProcess(argv, returncode, stdout.decode() if text else stdout)
+    
+    if check:
+        result.check_returncode()
+    return result
+
+
+def _cached_run(argv: List[str], ttl: float, text: bool = True, spawn: bool = False,
+                timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    """subprocess.run(argv, check=True) with successful results memoized for ttl seconds
+    
+    spawn=True launches through _spawn_collect instead of subprocess.
+    """
+    key = tuple(argv)
+    now = time.monotonic()
+    with _run_cache_lock:
+        entry = _run_cache.get(key)
+    if entry is not None and now - entry[0] < ttl:
+        return entry[1]
+    
+    if spawn:
+        result = _spawn_collect(argv, text=text, timeout=timeout)
+    else:
+        result = subprocess.run(argv, capture_output=True, text=text, check=True, timeout=timeout)
+    with _run_cache_lock:
+        _run_cache[key] = (now, result)
+    return result
+
+
+def _invalidate_run(argv: List[str]):
+    """Drop memoized output for argv"""
+    with _run_cache_lock:
+        _run_cache.pop(tuple(argv), None)
+
+
+def _i2c_devices_accessible() -> bool:
+    """True when ddcutil can open /dev/i2c-* without sudo (root, i2c group or udev rule)"""
+    if os.geteuid() == 0:
+        return True
+    return any(os.access(dev, os.R_OK | os.W_OK) for dev in glob.glob('/dev/i2c-*'))
+
+
+def _ddcutil_major_version() -> int:
+    """Installed ddcutil major version, 0 if unknown"""
+    try:
+        output = _cached_run(['ddcutil', '--version'], READINESS_TTL).stdout
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return 0
+    match = _DDCUTIL_VERSION_RE.search(output)
+    return int(match.group(1)) if match else 0
+
+
+def _ddcutil_base_command(mon: Dict[str, str]) -> List[str]:
+    """Base ddcutil argv for a monitor, addressed by I2C bus when known"""
+    # --bus skips the EDID scan that --display needs to resolve the monitor
+    if mon.get('i2c_bus'):
+        target = ['--bus', mon['i2c_bus']]
+    else:
+        target = ['--display', mon['ddcutil_id']]
+    if _ddcutil_major_version() >= 2:
+        # Detection already happened; dynamic sleep lets ddcutil tune and persist its own delays
+        target += ['--skip-ddc-checks', '--enable-dynamic-sleep']
+    return ['ddcutil', '--sleep-multiplier', DDCUTIL_SLEEP_MULTIPLIER] + target
+
+
+class _NonTableVcpValue(ctypes.Structure):
+    """Mirror of libddcutil's DDCA_Non_Table_Vcp_Value"""
+    _fields_ = [('mh', ctypes.c_uint8), ('ml', ctypes.c_uint8),
+                ('sh', ctypes.c_uint8), ('sl', ctypes.c_uint8)]
+
+
+class _DDCUtilClient:
+    """Thin ctypes wrapper around libddcutil so VCP access stays in-process"""
+    
+    _LIBRARY_NAMES = ('libddcutil.so.5', 'libddcutil.so.4', 'libddcutil.so')
+    
+    def __init__(self):
+        self.lib = None
+        for name in self._LIBRARY_NAMES:
+            try:
+                self.lib = ctypes.CDLL(name)
+                break
+            except OSError:
+                continue
+        if self.lib is not None:
+            try:
+                self._bind()
+            except AttributeError:
+                # Library too old to expose the calls we need
+                self.lib = None
+        if self.lib is not None:
+            self._init_library()
+    
+    @property
+    def available(self) -> bool:
+        return self.lib is not None
+    
+    def _bind(self):
+        """Declare signatures for the libddcutil calls we use"""
+        lib = self.lib
+        handle_p = ctypes.POINTER(ctypes.c_void_p)
+        # 2.x renamed ddca_create_display_ref to ddca_get_display_ref
+        self._get_display_ref = getattr(lib, 'ddca_get_display_ref', None) or lib.ddca_create_display_ref
+        signatures = [
+            (lib.ddca_create_dispno_display_identifier, [ctypes.c_int, handle_p]),
+            (lib.ddca_free_display_identifier, [ctypes.c_void_p]),
+            (self._get_display_ref, [ctypes.c_void_p, handle_p]),
+            (lib.ddca_open_display2, [ctypes.c_void_p, ctypes.c_bool, handle_p]),
+            (lib.ddca_close_display, [ctypes.c_void_p]),
+            (lib.ddca_get_non_table_vcp_value,
+             [ctypes.c_void_p, ctypes.c_uint8, ctypes.POINTER(_NonTableVcpValue)]),
+            (lib.ddca_set_non_table_vcp_value,
+             [ctypes.c_void_p, ctypes.c_uint8, ctypes.c_uint8, ctypes.c_uint8]),
+        ]
+        for func, argtypes in signatures:
+            func.argtypes = argtypes
+            func.restype = ctypes.c_int
+    
+    def _init_library(self):
+        """Run the explicit library setup 2.x expects before the first display call"""
+        ddca_init = getattr(self.lib, 'ddca_init', None)
+        if ddca_init is None:
+            # 1.x initializes itself when loaded
+            return
+        ddca_init.argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.c_int]
+        ddca_init.restype = ctypes.c_int
+        # No extra options, default syslog level, no init flags
+        status = ddca_init(None, -1, 0)
+        if status != 0:
+            print(f"libddcutil initialization returned {status}")
+    
+    def open_display(self, display_num: int) -> Optional[ctypes.c_void_p]:
+        """Open a display by its ddcutil display number, None on failure"""
+        if not self.available:
+            return None
+        lib = self.lib
+        did = ctypes.c_void_p()
+        if lib.ddca_create_dispno_display_identifier(display_num, ctypes.byref(did)) != 0:
+            return None
+        try:
+            dref = ctypes.c_void_p()
+            if self._get_display_ref(did, ctypes.byref(dref)) != 0:
+                return None
+            handle = ctypes.c_void_p()
+            if lib.ddca_open_display2(dref, False, ctypes.byref(handle)) != 0:
+                return None
+            return handle
+        finally:
+            lib.ddca_free_display_identifier(did)
+    
+    def close_display(self, handle: ctypes.c_void_p):
+        """Close a handle returned by open_display"""
+        if self.available:
+            self.lib.ddca_close_display(handle)
+    
+    def get_vcp(self, handle: ctypes.c_void_p, code: int) -> Optional[tuple]:
+        """Read a non-table VCP feature, returns (current, max) or None"""
+        value = _NonTableVcpValue()
+        status = self.lib.ddca_get_non_table_vcp_value(handle, code, ctypes.byref(value))
+        if status != 0:
+            return None
+        return (value.sh << 8) | value.sl, (value.mh << 8) | value.ml
+    
+    def set_vcp(self, handle: ctypes.c_void_p, code: int, value: int) -> bool:
+        """Write a non-table VCP feature"""
+        status = self.lib.ddca_set_non_table_vcp_value(handle, code, (value >> 8) & 0xFF, value & 0xFF)
+        return status == 0
+
+
+class BrightnessController:
+    """Handles brightness control operations using ddcutil and xrandr fallback"""
+    
+    def __init__(self, redetect: bool = False, background_probe: bool = False, long_lived: bool = False):
+        # Only controllers that outlive one command (GUI, daemon, hotkeys) start the DDC helper
+        self._long_lived = long_lived
+        self.cache_dir = Path.home() / '.cache' / 'lumonitor'
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._monitor_cache_file = self.cache_dir / 'monitors.json'
+        self._detect_stdout = None
+        
+        # sudo costs a PAM session per call, so it is only used without direct i2c access
+        self._ddcutil_prefix = [] if _i2c_devices_accessible() else ['sudo']
+        if self._ddcutil_prefix:
+            self._show_i2c_hint()
+        
+        self.brightness_cache = {}
+        self._cache_files_read = set()
+        self._cache_file_paths = {}  # monitor -> Path, filled eagerly for known monitors
+        self.use_ddcutil = None  # unknown until the hardware probe finishes
+        self._xrandr_cache = {}  # output -> software brightness reported by xrandr --verbose
+        self._xrandr_cache_loaded = False
+        self._ddc = None
+        self._ddc_handles = {}
+        self._set_monitors([])
+        
+        # Pending hardware writes, guarded by a condition the worker sleeps on
+        self.pending_changes = {}  # monitor -> brightness
+        self._cv = threading.Condition()
+        self._last_applied = {}  # monitor -> brightness the hardware is known to have
+        self._dirty_cache = {}  # monitor -> brightness not yet written to its cache file
+        self._cache_flush_at = 0.0
+        self._cache_fds = {}  # monitor -> fd of its cache file, only used by the worker
+        self._persisted = {}  # monitor -> value its cache file currently holds
+        self._bus_locks = {}  # i2c bus -> threading.Lock
+        self._bus_locks_guard = threading.Lock()
+        # One worker per I2C bus is plenty for any realistic multi-monitor desk
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+        
+        # Long-lived ddc_helper.py for monitors libddcutil cannot open in-process
+        self._helper = None
+        self._helper_failed = False
+        self._helper_lock = threading.Lock()
+        self.worker_thread = None
+        self.running = True
+        
+        # Hardware discovery; a recent ddcutil detect result spares the multi-second probe
+        self.ready = threading.Event()
+        self._ready_callbacks = []
+        self._probe_thread = None
+        cached_monitors = None if redetect else self._load_monitor_cache()
+        if cached_monitors or not background_probe:
+            # libddcutil runs its own display detection when handles are opened,
+            # so a GUI opens them off the main thread and one-shot runs never do
+            self._probe_hardware(cached_monitors, open_ddc=long_lived and not background_probe)
+            if long_lived and background_probe:
+                self._probe_thread = threading.Thread(target=self._open_ddc_access, daemon=True)
+                self._probe_thread.start()
+        else:
+            self._probe_thread = threading.Thread(target=self._probe_hardware, args=(None, long_lived),
+                                                  daemon=True)
+            self._probe_thread.start()
+        
+        # Start background worker
+        self._start_worker()
+    
+    def _probe_hardware(self, cached_monitors: Optional[List[Dict[str, str]]] = None,
+                        open_ddc: bool = False):
+        """Detect monitors, run the when_ready callbacks, then optionally open DDC/CI access"""
+        try:
+            if cached_monitors:
+                self.use_ddcutil = True
+                self._set_monitors(cached_monitors)
+            else:
+                use_ddcutil = self.check_ddcutil_available()
+                self.use_ddcutil = use_ddcutil
+                self._set_monitors(self.get_monitors())
+                if use_ddcutil:
+                    self._save_monitor_cache()
+        finally:
+            with self._cv:
+                self.ready.set()
+                callbacks, self._ready_callbacks = self._ready_callbacks, []
+            for callback in callbacks:
+                callback()
+        if open_ddc:
+            self._open_ddc_access()
+    
+    def _open_ddc_access(self):
+        """Open in-process libddcutil handles; until then writes go through the ddcutil CLI"""
+        if not self.use_ddcutil:
+            return
+        ddc = _DDCUtilClient()
+        handles = self._open_ddc_handles(ddc, self.monitors)
+        # Client before handles: a thread that finds a handle must also find its client
+        self._ddc = ddc
+        self._ddc_handles = handles
+    
+    def redetect(self):
+        """Forget every cached monitor list and probe the hardware again (e.g. after hotplug)"""
+        self._invalidate_monitor_cache()
+        self.invalidate_xrandr_cache()
+        _invalidate_run(self._ddcutil_prefix + DDCUTIL_DETECT_COMMAND)
+        # Readers and writers use a handle only under its bus lock, so close each one under it
+        buses = {self._bus_name(monitor): monitor for monitor in self._ddc_handles}
+        with contextlib.ExitStack() as stack:
+            for bus in sorted(buses):
+                stack.enter_context(self._bus_lock(buses[bus]))
+            handles, self._ddc_handles = self._ddc_handles, {}
+            for handle in handles.values():
+                self._ddc.close_display(handle)
+        self.ready.clear()
+        self._probe_hardware(open_ddc=self._long_lived)
+    
+    def when_ready(self, callback: Callable[[], None]):
+        """Call callback once monitors are known, immediately if they already are
+        
+        With background_probe the callback runs on the probe thread.
+        """
+        with self._cv:
+            if not self.ready.is_set():
+                self._ready_callbacks.append(callback)
+                return
+        callback()
+    
+    def _set_monitors(self, monitors: List[Dict[str, str]]):
+        """Replace the monitor list and rebuild the lookups derived from it"""
+        self.monitors = monitors
+        self._monitor_by_name = {mon['name']: mon for mon in monitors}
+        for mon in monitors:
+            self._get_cache_file(mon['name'])
+    
+    def _start_worker(self):
+        """Start background worker thread for applying brightness changes"""
+        self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self.worker_thread.start()
+    
+    def _worker_loop(self):
+        """Background worker that applies brightness changes and persists the cache files"""
+        while True:
+            with self._cv:
+                while not self.pending_changes:
+                    if not self._dirty_cache:
+                        if not self.running:
+                            return  # Closed and fully drained
+                        self._cv.wait()
+                        continue
+                    delay = self._cache_flush_at - time.monotonic()
+                    if delay <= 0 or not self.running:
+                        break
+                    self._cv.wait(delay)
+                    
+                # Process all pending changes
+                to_apply = dict(self.pending_changes)
+                self.pending_changes.clear()
+                
+                # Cache files are rewritten at most once per CACHE_FLUSH_INTERVAL
+                to_persist = {}
+                if self._dirty_cache and (not self.running or time.monotonic() >= self._cache_flush_at):
+                    to_persist, self._dirty_cache = self._dirty_cache, {}
+                    self._cache_flush_at = time.monotonic() + CACHE_FLUSH_INTERVAL
+            
+            # Apply changes outside the lock (can be slow)
+            if to_apply:
+                self._apply_brightness_batch(to_apply)
+            for monitor, brightness in to_persist.items():
+                self._persist_cached_brightness(monitor, brightness)
+    
+    def close(self):
+        """Apply any pending changes, stop the worker and release display handles"""
+        if self._probe_thread is not None:
+            self._probe_thread.join()
+            self._probe_thread = None
+        with self._cv:
+            self.running = False
+            self._cv.notify_all()
+        if self.worker_thread is not None:
+            self.worker_thread.join()
+            self.worker_thread = None
+        self._pool.shutdown()
+        for fd in self._cache_fds.values():
+            os.close(fd)
+        self._cache_fds = {}
+        
+        for handle in self._ddc_handles.values():
+            self._ddc.close_display(handle)
+        self._ddc_handles = {}
+        self._stop_helper()
+    
+    def _helper_request(self, mon: Dict[str, str], request: str) -> Optional[List[bytes]]:
+        """Send one request to the DDC helper, returns the reply fields after OK or None"""
+        line = f"{request} {mon.get('i2c_bus') or ''}".rstrip().encode() + b"\n"
+        with self._helper_lock:
+            if self._helper is None:
+                if self._helper_failed or not self._helper_useful() or not HELPER_PATH.exists():
+                    return None
+                try:
+                    # sudo -n: a password prompt would read our request pipe
+                    prefix = ['sudo', '-n'] if self._ddcutil_prefix else []
+                    self._helper = subprocess.Popen(prefix + [sys.executable, '-u', str(HELPER_PATH)],
+                                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                                    stderr=subprocess.DEVNULL, bufsize=0)
+                except OSError:
+                    self._helper_failed = True
+                    return None
+            try:
+                self._helper.stdin.write(line)
+                # The helper bounds its own ddcutil runs; allow a little on top of that
+                if select.select([self._helper.stdout], [], [], DDC_TIMEOUT + 2)[0]:
+                    reply = self._helper.stdout.readline()
+                else:
+                    reply = b''
+            except OSError:
+                reply = b''
+            if not reply:
+                # Helper died, hung or sudo refused; use one-shot ddcutil from now on
+                self._helper_failed = True
+                self._stop_helper()
+                return None
+        fields = reply.split()
+        if not fields or fields[0] != b'OK':
+            return None
+        return fields[1:]
+    
+    def _helper_useful(self) -> bool:
+        """Whether a helper process beats spawning ddcutil for this controller"""
+        # Without libddcutil or sudo the helper could only spawn ddcutil itself
+        if not self._long_lived:
+            return False
+        return bool(self._ddcutil_prefix) or (self._ddc is not None and self._ddc.available)
+    
+    def _stop_helper(self):
+        """Close the helper's stdin and reap it"""
+        helper, self._helper = self._helper, None
+        if helper is None:
+            return
+        try:
+            helper.stdin.close()
+            helper.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            helper.kill()
+            helper.wait()
+        
+    def _open_ddc_handles(self, ddc: Optional[_DDCUtilClient],
+                          monitors: List[Dict[str, str]]) -> Dict[str, ctypes.c_void_p]:
+        """Open a libddcutil handle once for every ddcutil monitor"""
+        handles = {}
+        if ddc is None or not ddc.available:
+            return handles
+        for mon in monitors:
+            ddcutil_id = mon.get('ddcutil_id')
+            if not ddcutil_id:
+                continue
+            handle = ddc.open_display(int(ddcutil_id))
+            if handle is not None:
+                handles[mon['name']] = handle
+        if len(handles) < sum(1 for mon in monitors if mon.get('ddcutil_id')):
+            print("libddcutil could not open every display; add yourself to the i2c group "
+                  "for sudo-free access. Falling back to the ddcutil command.")
+        return handles
+    
+    def _show_i2c_hint(self):
+        """Explain once how to run ddcutil without sudo"""
+        hint_file = self.cache_dir / 'i2c_hint_shown'
+        if hint_file.exists():
+            return
+        print("ddcutil runs through sudo. For faster, password-free access run:\n"
+              "  sudo usermod -aG i2c $USER && sudo modprobe i2c-dev\n"
+              "then log out and back in.")
+        try:
+            hint_file.touch()
+        except OSError:
+            pass
+    
+    def _load_monitor_cache(self) -> Optional[List[Dict[str, str]]]:
+        """Monitors from a recent ddcutil detect, None if missing or stale"""
+        try:
+            if time.time() - self._monitor_cache_file.stat().st_mtime > MONITOR_CACHE_MAX_AGE:
+                return None
+            monitors = json.loads(self._monitor_cache_file.read_text())
+        except (OSError, ValueError):
+            return None
+        return monitors if isinstance(monitors, list) else None
+    
+    def _save_monitor_cache(self):
+        """Persist the detected ddcutil monitors for later processes"""
+        try:
+            self._monitor_cache_file.write_text(json.dumps(self.monitors))
+        except IOError:
+            pass
+    
+    def _invalidate_monitor_cache(self):
+        """Force the next controller to run ddcutil detect again"""
+        try:
+            self._monitor_cache_file.unlink()
+        except OSError:
+            pass
+    
+    def _get_cache_file(self, monitor: str) -> Path:
+        """Get cache file path for a monitor"""
+        cache_file = self._cache_file_paths.get(monitor)
+        if cache_file is None:
+            # Sanitize monitor name for filename
+            safe_name = monitor.replace('/', '_').replace(' ', '_')
+            cache_file = self._cache_file_paths[monitor] = self.cache_dir / f'brightness_{safe_name}'
+        return cache_file
+    
+    def _read_cached_brightness(self, monitor: str) -> Optional[float]:
+        """Read brightness from cache file"""
+        # The file is a few bytes; a single read skips the stat and text decoding layers
+        try:
+            fd = os.open(self._get_cache_file(monitor), os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            value = float(os.read(fd, 16))
+            return max(0.0, min(1.0, value))
+        except (ValueError, OSError):
+            return None
+        finally:
+            os.close(fd)
+    
+    def _write_cached_brightness(self, monitor: str, brightness: float):
+        """Queue brightness for the cache file, written later by the worker thread"""
+        with self._cv:
+            if self._dirty_cache.get(monitor, self._persisted.get(monitor)) == brightness:
+                return  # The file already has (or is about to get) this value
+            self._dirty_cache[monitor] = brightness
+            self._cv.notify()
+    
+    def _persist_cached_brightness(self, monitor: str, brightness: float):
+        """Overwrite the cache file for a monitor through a descriptor held for the session"""
+        data = b"%.2f\n" % brightness
+        try:
+            fd = self._cache_fds.get(monitor)
+            if fd is None:
+                fd = self._cache_fds[monitor] = os.open(self._get_cache_file(monitor),
+                                                         os.O_RDWR | os.O_CREAT, 0o644)
+            # A single small pwrite at offset 0 is never seen half-written by readers
+            os.pwrite(fd, data, 0)
+            os.ftruncate(fd, len(data))
+            self._persisted[monitor] = brightness
+        except OSError:
+            pass
+        
+    def check_ddcutil_available(self) -> bool:
+        """Check if ddcutil is available and working"""
+        self._detect_stdout = None
+        try:
+            result = _cached_run(self._ddcutil_prefix + DDCUTIL_DETECT_COMMAND, READINESS_TTL, text=False, spawn=True)
+            # Kept for get_ddcutil_monitors so startup runs a single detect
+            self._detect_stdout = result.stdout
+            # Check if any displays found
+            if b"Display 1" in result.stdout or b"Display 2" in result.stdout:
+                return True
+            return False
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return False
+        
+    def get_monitors(self) -> List[Dict[str, str]]:
+        """Get list of available monitors"""
+        if self.use_ddcutil:
+            return self.get_ddcutil_monitors()
+        else:
+            return self.get_xrandr_monitors()
+    
+    def get_ddcutil_monitors(self) -> List[Dict[str, str]]:
+        """Get monitors using ddcutil"""
+        try:
+            stdout, self._detect_stdout = self._detect_stdout, None
+            if stdout is None:
+                stdout = _cached_run(self._ddcutil_prefix + DDCUTIL_DETECT_COMMAND, DISCOVERY_TTL,
+                                     text=False, spawn=True).stdout
+            monitors = []
+            
+            for match in _DDC_DISPLAY_RE.finditer(stdout):
+                display_num = match.group(1).decode()
+                bus = _I2C_BUS_RE.search(match.group(2))
+                monitors.append({
+                    'name': f"display-{display_num}",
+                    'display_name': f"{match.group(3).decode(errors='replace') or 'Monitor'} (Display {display_num})",
+                    'ddcutil_id': display_num,
+                    'i2c_bus': bus.group(1).decode() if bus else None
+                })
+            
+            return monitors
+        except subprocess.CalledProcessError:
+            # Fallback to xrandr if ddcutil fails
+            return self.get_xrandr_monitors()
+    
+    def _xrandr_cache_key(self) -> str:
+        """Identify the X server and xrandr build the cached monitor list belongs to"""
+        try:
+            version = _cached_run(['xrandr', '--version'], READINESS_TTL).stdout.strip()
+        except subprocess.CalledProcessError:
+            version = ''
+        return f"{os.environ.get('DISPLAY', '')}|{version}"
+    
+    def invalidate_xrandr_cache(self):
+        """Forget the persisted xrandr monitor list, e.g. after a screen change"""
+        _invalidate_run(['xrandr', '--current', '--listmonitors'])
+        try:
+            (self.cache_dir / 'xrandr_monitors.json').unlink()
+        except OSError:
+            pass
+    
+    def get_xrandr_monitors(self) -> List[Dict[str, str]]:
+        """Get monitors using xrandr (fallback method)"""
+        cache_file = self.cache_dir / 'xrandr_monitors.json'
+        key = self._xrandr_cache_key()
+        try:
+            # Aged out like monitors.json, so a dock change while no GUI watched is picked up
+            if time.time() - cache_file.stat().st_mtime <= MONITOR_CACHE_MAX_AGE:
+                cached = json.loads(cache_file.read_text())
+                if cached.get('key') == key:
+                    return cached['monitors']
+        except (OSError, ValueError, AttributeError, KeyError):
+            pass
+        
+        # --current reports the server's known state instead of re-probing outputs
+        try:
+            result = _cached_run(['xrandr', '--current', '--listmonitors'], DISCOVERY_TTL, text=False)
+        except subprocess.CalledProcessError:
+            return [{'name': 'default', 'display_name': 'Default Monitor', 'ddcutil_id': None}]
+        
+        monitors = []
+        for match in _LISTMONITORS_RE.finditer(result.stdout):
+            monitor_name = match.group(1).decode()
+            monitors.append({
+                'name': monitor_name,
+                'display_name': monitor_name.replace('-', ' ').title(),
+                'ddcutil_id': None
+            })
+        
+        try:
+            cache_file.write_text(json.dumps({'key': key, 'monitors': monitors}))
+        except IOError:
+            pass
+        return monitors
+    
+    def get_brightness(self, monitor: str) -> float:
+        """Get current brightness for a monitor (0.0 to 1.0)"""
+        # İlk önce cache'i kontrol et (memory is authoritative, the file only seeds it)
+        cached = self.peek_brightness(monitor)
+        if cached is not None:
+            return cached
+        
+        # Cache yoksa ddcutil veya xrandr'dan oku
+        if self.use_ddcutil:
+            brightness = self.get_ddcutil_brightness(monitor)
+        else:
+            brightness = self.brightness_cache.setdefault(monitor, self._get_xrandr_brightness(monitor))
+        
+        # Cache'e yaz
+        self._write_cached_brightness(monitor, brightness)
+        return brightness
+    
+    def _refresh_xrandr_cache(self):
+        """Read the software brightness of every output with a single xrandr call"""
+        try:
+            result = _cached_run(['xrandr', '--current', '--verbose'], DISCOVERY_TTL, text=False)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return
+        for match in _XRANDR_BRIGHTNESS_RE.finditer(result.stdout):
+            try:
+                self._xrandr_cache[match.group(1).decode()] = float(match.group(2))
+            except ValueError:
+                continue
+    
+    def _get_xrandr_brightness(self, monitor: str) -> float:
+        """Software brightness xrandr reports for an output, read once per process"""
+        if monitor not in self._xrandr_cache and not self._xrandr_cache_loaded:
+            self._xrandr_cache_loaded = True
+            self._refresh_xrandr_cache()
+        return self._xrandr_cache.get(monitor, 1.0)
+    
+    def peek_brightness(self, monitor: str) -> Optional[float]:
+        """Brightness from the memory or file cache, None rather than querying hardware"""
+        cached = self.brightness_cache.get(monitor)
+        if cached is None and monitor not in self._cache_files_read:
+            # Each file is consulted once; afterwards memory is authoritative
+            self._cache_files_read.add(monitor)
+            cached = self._read_cached_brightness(monitor)
+            if cached is not None:
+                self._persisted.setdefault(monitor, cached)
+                self.brightness_cache.setdefault(monitor, cached)
+        return cached
+    
+    def get_cached_brightness(self, monitor: str) -> float:
+        """Last known brightness for a monitor, without querying hardware when possible"""
+        cached = self.peek_brightness(monitor)
+        if cached is not None:
+            return cached
+        return self.get_brightness(monitor)
+    
+    def sync_cached_brightness(self, monitor: str):
+        """Adopt a level another lumonitor process wrote to the cache file since we last looked"""
+        with self._cv:
+            if monitor in self._dirty_cache or monitor in self.pending_changes:
+                return  # Our own newer value has not reached the file yet
+        stored = self._read_cached_brightness(monitor)
+        if stored is None or stored == self._persisted.get(monitor):
+            return
+        self._persisted[monitor] = stored
+        self.brightness_cache[monitor] = stored
+        # The hardware was changed behind our back, so the next write must not be skipped
+        self._last_applied.pop(monitor, None)
+    
+    def refresh_all(self):
+        """Re-read real brightness values so the in-memory cache tracks external changes"""
+        if not self.use_ddcutil:
+            # xrandr brightness is software-only, our own cache is authoritative
+            return
+        for mon in self.monitors:
+            name = mon['name']
+            with self._cv:
+                if name in self.pending_changes:
+                    # A write is still queued; hardware would report the stale value
+                    continue
+                dirty_before = self._dirty_cache.get(name)
+            brightness = self.get_ddcutil_brightness(name)
+            with self._cv:
+                if name in self.pending_changes or self._dirty_cache.get(name) != dirty_before:
+                    # set_brightness ran during the read; keep its newer value
+                    self.brightness_cache[name] = self.pending_changes.get(name, self._dirty_cache.get(name))
+                    continue
+                self._write_cached_brightness(name, brightness)
+    
+    def _ddcutil_command(self, mon: Dict[str, str]) -> List[str]:
+        """Base ddcutil argv for a monitor, including sudo when it is needed"""
+        return self._ddcutil_prefix + _ddcutil_base_command(mon)
+    
+    def get_ddcutil_brightness(self, monitor: str) -> float:
+        """Get brightness using ddcutil"""
+        try:
+            with self._bus_lock(monitor):
+                return self._read_ddcutil_brightness(monitor)
+        except TimeoutError as e:
+            print(f"ddcutil error reading brightness: {e}")
+            return self.brightness_cache.get(monitor, 1.0)
+    
+    def _read_ddcutil_brightness(self, monitor: str) -> float:
+        """get_ddcutil_brightness without the bus lock"""
+        handle = self._ddc_handles.get(monitor)
+        if handle is not None:
+            value = self._ddc.get_vcp(handle, VCP_BRIGHTNESS)
+            if value is not None and value[1]:
+                brightness = value[0] / value[1]
+                self.brightness_cache[monitor] = brightness
+                self._last_applied[monitor] = brightness
+                return brightness
+        
+        try:
+            target = self._monitor_by_name.get(monitor)
+            if not target or not target.get('ddcutil_id'):
+                return self.brightness_cache.get(monitor, 1.0)
+            
+            reply = self._helper_request(target, f"GET {target['ddcutil_id']} 10")
+            if reply and len(reply) == 2 and int(reply[1]):
+                brightness = int(reply[0]) / int(reply[1])
+                self.brightness_cache[monitor] = brightness
+                self._last_applied[monitor] = brightness
+                return brightness
+            
+            # Get brightness using VCP code 10 (brightness)
+            result = _cached_run(self._ddcutil_command(target) + ['getvcp', '10'], BRIGHTNESS_TTL, text=False, spawn=True,
+                                 timeout=DDC_TIMEOUT)
+            
+            # Parse output: "VCP code 0x10 (Brightness): current value = 80, max value = 100"
+            match = _VCP_RE.search(result.stdout)
+            if match:
+                current, max_val = int(match.group(1)), int(match.group(2))
+                if max_val:
+                    brightness = current / max_val
+                    self.brightness_cache[monitor] = brightness
+                    self._last_applied[monitor] = brightness
+                    return brightness
+                    
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            pass
+        
+        return self.brightness_cache.get(monitor, 1.0)
+    
+    def set_brightness(self, monitor: str, brightness: float):
+        """Set brightness for a monitor (0.0 to 1.0) - immediate cache update, async hardware"""
+        # Clamp brightness between 0.1 and 1.0
+        brightness = clamp_brightness(brightness)
+        
+        # İlk önce cache'e yaz (anında UI response)
+        self._write_cached_brightness(monitor, brightness)
+        
+        # Memory cache'i de güncelle
+        self.brightness_cache[monitor] = brightness
+        
+        # Hardware değişikliğini queue'ya ekle (async)
+        with self._cv:
+            self.pending_changes[monitor] = brightness
+            self._cv.notify()
+        
+        return True
+    
+    def set_brightness_many(self, values: Dict[str, float]) -> Dict[str, bool]:
+        """Set brightness for several monitors at once, applied to hardware as one batch"""
+        results = {monitor: monitor in self._monitor_by_name for monitor in values}
+        clamped = {monitor: clamp_brightness(brightness) for monitor, brightness in values.items()
+                   if results[monitor]}
+        for monitor, brightness in clamped.items():
+            self._write_cached_brightness(monitor, brightness)
+            self.brightness_cache[monitor] = brightness
+        
+        with self._cv:
+            self.pending_changes.update(clamped)
+            self._cv.notify()
+        
+        return results
+    
+    def _apply_brightness_batch(self, values: Dict[str, float]):
+        """Apply several brightness changes, newest value wins and no-op writes are skipped"""
+        if len(values) == 1:
+            self._apply_one(*next(iter(values.items())))
+            return
+        if not self.use_ddcutil:
+            self._apply_xrandr_batch(values)
+            return
+        # Monitors sit on separate I2C buses, so their DDC/CI delays can overlap
+        list(self._pool.map(self._apply_one, values.keys(), values.values()))
+    
+    def _apply_one(self, monitor: str, brightness: float):
+        """Write one monitor's newest target unless the hardware already has it"""
+        # A newer target may have arrived while this batch was being written
+        with self._cv:
+            brightness = self.pending_changes.pop(monitor, brightness)
+        
+        last = self._last_applied.get(monitor)
+        if last is not None and _same_percent(brightness, last):
+            return
+        if self._apply_brightness_hardware(monitor, brightness):
+            self._last_applied[monitor] = brightness
+    
+    def _apply_xrandr_batch(self, values: Dict[str, float]):
+        """Write every changed xrandr output with a single xrandr run"""
+        changed = {}
+        with self._cv:
+            for monitor, brightness in values.items():
+                brightness = self.pending_changes.pop(monitor, brightness)
+                last = self._last_applied.get(monitor)
+                if last is None or not _same_percent(brightness, last):
+                    changed[monitor] = brightness
+        if changed and self.set_xrandr_brightness_many(changed):
+            self._last_applied.update(changed)
+    
+    def _bus_name(self, monitor: str) -> str:
+        """Name of the I2C bus a monitor sits on, used to key its lock"""
+        mon = self._monitor_by_name.get(monitor, {})
+        return f"i2c-{mon['i2c_bus']}" if mon.get('i2c_bus') else f"display-{mon.get('ddcutil_id')}"
+    
+    @contextlib.contextmanager
+    def _bus_lock(self, monitor: str):
+        """Serialize DDC/CI traffic per I2C bus, across threads and lumonitor processes"""
+        bus = self._bus_name(monitor)
+        with self._bus_locks_guard:
+            lock = self._bus_locks.get(bus)
+            if lock is None:
+                lock = self._bus_locks[bus] = threading.Lock()
+        deadline = time.monotonic() + BUS_LOCK_TIMEOUT
+        if not lock.acquire(timeout=BUS_LOCK_TIMEOUT):
+            raise TimeoutError(f"{bus} is busy")
+        try:
+            try:
+                fd = os.open(self.cache_dir / f'{bus}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+            except OSError:
+                yield
+                return
+            try:
+                # Concurrent ddcutil runs on one bus can wedge the i2c driver
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            raise TimeoutError(f"{bus} is locked by another lumonitor process") from None
+                        time.sleep(0.05)
+                yield
+            finally:
+                os.close(fd)
+        finally:
+            lock.release()
+    
+    def _apply_brightness_hardware(self, monitor: str, brightness: float) -> bool:
+        """Actually apply brightness to hardware (called from worker thread)"""
+        if self.use_ddcutil:
+            try:
+                with self._bus_lock(monitor):
+                    return self.set_ddcutil_brightness(monitor, brightness)
+            except TimeoutError as e:
+                print(f"ddcutil error setting brightness: {e}")
+                return False
+        else:
+            return self.set_xrandr_brightness(monitor, brightness)
+    
+    def set_ddcutil_brightness(self, monitor: str, brightness: float) -> bool:
+        """Set brightness using ddcutil"""
+        handle = self._ddc_handles.get(monitor)
+        if handle is not None and self._ddc.set_vcp(handle, VCP_BRIGHTNESS, round(brightness * 100)):
+            self.brightness_cache[monitor] = brightness
+            return True
+        
+        try:
+            target = self._monitor_by_name.get(monitor)
+            if not target or not target.get('ddcutil_id'):
+                return False
+            
+            # Convert 0.0-1.0 to 0-100 scale
+            brightness_percent = round(brightness * 100)
+            
+            if self._helper_request(target, f"SET {target['ddcutil_id']} 10 {brightness_percent}") is not None:
+                self.brightness_cache[monitor] = brightness
+                return True
+            
+            # Set brightness using VCP code 10 (brightness)
+            command = self._ddcutil_command(target)
+            _spawn_collect(command + ['--noverify', 'setvcp', '10', str(brightness_percent)], timeout=DDC_TIMEOUT)
+            _invalidate_run(command + ['getvcp', '10'])
+            
+            # Başarılı olursa memory cache'i de güncelle
+            self.brightness_cache[monitor] = brightness
+            return True
+            
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            print(f"ddcutil error setting brightness: {e}")
+            # The bus may have changed since the monitors were cached
+            self._invalidate_monitor_cache()
+            return False
+    
+    def set_xrandr_brightness(self, monitor: str, brightness: float) -> bool:
+        """Set brightness using xrandr (software-only)"""
+        try:
+            subprocess.run(['xrandr', '--output', monitor, '--brightness', str(brightness)], 
+                          check=True)
+            # Memory cache'i güncelle
+            self.brightness_cache[monitor] = brightness
+            self._xrandr_cache[monitor] = brightness
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"xrandr error setting brightness: {e}")
+            return False
+    
+    def set_xrandr_brightness_many(self, values: Dict[str, float]) -> bool:
+        """Set brightness on several outputs with one xrandr invocation"""
+        command = ['xrandr']
+        for monitor, brightness in values.items():
+            command += ['--output', monitor, '--brightness', f'{brightness:.2f}']
+        try:
+            subprocess.run(command, check=True)
+        except subprocess.CalledProcessError as e:
+            print(f"xrandr error setting brightness: {e}")
+            return False
+        self.brightness_cache.update(values)
+        self._xrandr_cache.update(values)
+        return True
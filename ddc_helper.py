@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Lumonitor DDC/CI helper
+Long-lived process that applies VCP reads and writes sent line by line on stdin,
+so brightness changes do not pay a fork/exec (and sudo) per operation
+
+Protocol (one request per line, one reply per line):
+    GET <display> <vcp hex> [bus]          -> OK <current> <max> | ERR
+    SET <display> <vcp hex> <value> [bus]  -> OK | ERR
+"""
+
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from brightness import _DDCUtilClient, _VCP_RE, _ddcutil_base_command, DDC_TIMEOUT
+
+
+def _ddcutil(display: str, bus: str, args):
+    """Run ddcutil for one display and return its stdout"""
+    # Same flags as the controller's own ddcutil path
+    command = _ddcutil_base_command({'ddcutil_id': display, 'i2c_bus': bus})
+    return subprocess.run(command + args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                          check=True, timeout=DDC_TIMEOUT).stdout
+
+
+def handle_request(client: _DDCUtilClient, handles: dict, parts) -> bytes:
+    """Execute one parsed request and return the reply line"""
+    command, display, code = parts[0], parts[1], parts[2]
+    if command == 'GET':
+        bus = parts[3] if len(parts) > 3 else None
+    else:
+        bus = parts[4] if len(parts) > 4 else None
+
+    if client.available and display not in handles:
+        handles[display] = client.open_display(int(display))
+    handle = handles.get(display)
+
+    if command == 'GET':
+        if handle is not None:
+            value = client.get_vcp(handle, int(code, 16))
+            if value is not None:
+                return f"OK {value[0]} {value[1]}\n".encode()
+        match = _VCP_RE.search(_ddcutil(display, bus, ['getvcp', code]))
+        if match:
+            return b"OK " + match.group(1) + b" " + match.group(2) + b"\n"
+        return b"ERR\n"
+
+    if command == 'SET':
+        value = parts[3]
+        if handle is not None and client.set_vcp(handle, int(code, 16), int(value)):
+            return b"OK\n"
+        _ddcutil(display, bus, ['--noverify', 'setvcp', code, value])
+        return b"OK\n"
+
+    return b"ERR\n"
+
+
+def main():
+    """Serve requests until stdin is closed"""
+    client = _DDCUtilClient()
+    handles = {}
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+
+    for line in iter(stdin.readline, b''):
+        parts = line.decode(errors='replace').split()
+        try:
+            reply = handle_request(client, handles, parts) if len(parts) >= 3 else b"ERR\n"
+        except (subprocess.SubprocessError, OSError, ValueError, IndexError):
+            reply = b"ERR\n"
+        stdout.write(reply)
+        stdout.flush()
+
+    for handle in handles.values():
+        if handle is not None:
+            client.close_display(handle)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,15 @@ Global keyboard shortcuts for brightness control
 """
 
 from pynput import keyboard
+import concurrent.futures
 import subprocess
 import json
 import os
 import sys
-from typing import Dict, Callable
+import threading
+from typing import Dict, Callable, List
+
+from brightness import clamp_brightness
 
 
 class HotkeyManager:
@@ -25,29 +29,93 @@ class HotkeyManager:
             '<ctrl>+<alt>+<shift>+r': self.reset_brightness,
         }
         self.step_size = 0.1  # 10% steps
+        self.refresh_interval = 30  # seconds between hardware re-reads
+        self._refresh_timer = None
+        
+        # Key auto-repeat is coalesced into one pending target per monitor
+        self.flush_delay = 0.1  # seconds
+        self._target = {}  # monitor_name -> brightness
+        self._target_lock = threading.Lock()
+        self._flush_timer = None
+        
+        # Per-monitor reads can block on DDC/CI, so monitors are handled concurrently
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+    
+    def _map_monitors(self, func: Callable[[str], float], names: List[str]) -> List[float]:
+        """Run func for every monitor name in parallel and return the results in order"""
+        futures = [self._pool.submit(func, name) for name in names]
+        concurrent.futures.wait(futures)
+        return [future.result() for future in futures]
+    
+    def _current_brightness(self, name: str) -> float:
+        """Known level for a monitor, including changes made by other lumonitor processes"""
+        self.brightness_controller.sync_cached_brightness(name)
+        return self.brightness_controller.get_cached_brightness(name)
+    
+    def _step_all(self, step: float) -> Dict[str, float]:
+        """Move every monitor's pending target by step in a single pass"""
+        names = [monitor['name'] for monitor in self.brightness_controller.monitors]
+        with self._target_lock:
+            base = {name: self._target[name] for name in names if name in self._target}
+        
+        # Only cold monitors need a (possibly blocking) read
+        missing = [name for name in names if name not in base]
+        if missing:
+            base.update(zip(missing, self._map_monitors(self._current_brightness, missing)))
+        
+        targets = {name: clamp_brightness(base[name] + step) for name in names}
+        with self._target_lock:
+            self._target.update(targets)
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self._flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return targets
+    
+    def _flush(self):
+        """Send the latest pending targets to the brightness controller"""
+        with self._target_lock:
+            targets = self._target
+            self._target = {}
+            self._flush_timer = None
+        if targets:
+            self.brightness_controller.set_brightness_many(targets)
+    
+    def _cancel_pending(self):
+        """Drop pending step targets"""
+        with self._target_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._target = {}
         
     def increase_brightness(self):
         """Increase brightness for all monitors"""
-        for monitor in self.brightness_controller.monitors:
-            current = self.brightness_controller.get_brightness(monitor['name'])
-            new_brightness = min(1.0, current + self.step_size)
-            self.brightness_controller.set_brightness(monitor['name'], new_brightness)
+        for new_brightness in self._step_all(self.step_size).values():
             print(f"Brightness: {new_brightness * 100:.0f}%")
     
     def decrease_brightness(self):
         """Decrease brightness for all monitors"""
-        for monitor in self.brightness_controller.monitors:
-            current = self.brightness_controller.get_brightness(monitor['name'])
-            new_brightness = max(0.1, current - self.step_size)
-            self.brightness_controller.set_brightness(monitor['name'], new_brightness)
+        for new_brightness in self._step_all(-self.step_size).values():
             print(f"Brightness: {new_brightness * 100:.0f}%")
     
     def reset_brightness(self):
         """Reset brightness to 100% for all monitors"""
-        for monitor in self.brightness_controller.monitors:
-            self.brightness_controller.set_brightness(monitor['name'], 1.0)
+        self._cancel_pending()
+        self.brightness_controller.set_brightness_many(
+            {monitor['name']: 1.0 for monitor in self.brightness_controller.monitors})
         print("Brightness reset to 100%")
     
+    def _schedule_refresh(self):
+        """Re-read real brightness now and again every refresh_interval seconds"""
+        try:
+            self.brightness_controller.refresh_all()
+        except Exception as e:
+            print(f"Error refreshing brightness: {e}")
+        self._refresh_timer = threading.Timer(self.refresh_interval, self._schedule_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+    
     def on_hotkey_pressed(self, hotkey_func):
         """Handle hotkey press"""
         try:
@@ -66,34 +134,23 @@ class HotkeyManager:
         print("  Ctrl+Alt+↓     : Decrease brightness") 
         print("  Ctrl+Alt+Shift+R : Reset to 100%")
         
-        # Create hotkey combinations
-        hotkey_combinations = []
-        for hotkey_str, func in self.hotkeys.items():
-            try:
-                # Parse hotkey string to pynput format
-                combo = self.parse_hotkey(hotkey_str)
-                hotkey_combinations.append((combo, lambda f=func: self.on_hotkey_pressed(f)))
-            except Exception as e:
-                print(f"Error parsing hotkey {hotkey_str}: {e}")
+        self._schedule_refresh()
         
         # Start global hotkey listener
+        bindings = {hotkey_str: (lambda f=func: self.on_hotkey_pressed(f))
+                    for hotkey_str, func in self.hotkeys.items()}
         try:
-            with keyboard.GlobalHotKeys({
-                '<ctrl>+<alt>+<up>': self.increase_brightness,
-                '<ctrl>+<alt>+<down>': self.decrease_brightness,
-                '<ctrl>+<alt>+<shift>+r': self.reset_brightness,
-            }) as self.listener:
+            with keyboard.GlobalHotKeys(bindings) as self.listener:
                 self.listener.join()
         except Exception as e:
             print(f"Error starting hotkey listener: {e}")
     
-    def parse_hotkey(self, hotkey_str: str):
-        """Parse hotkey string to pynput format"""
-        # This is a simplified parser - pynput handles the format directly
-        return hotkey_str
-    
     def stop_listening(self):
         """Stop listening for hotkeys"""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        self._flush()
         if self.listener is not None:
             self.listener.stop()
             self.listener = None
@@ -107,7 +164,7 @@ def main():
     try:
         from lumonitor import BrightnessController
         
-        brightness_controller = BrightnessController()
+        brightness_controller = BrightnessController(long_lived=True)
         hotkey_manager = HotkeyManager(brightness_controller)
         
         print("Lumonitor Hotkey Service")
@@ -118,6 +175,7 @@ def main():
         except KeyboardInterrupt:
             print("\nExiting hotkey service...")
             hotkey_manager.stop_listening()
+            brightness_controller.close()
             
     except ImportError as e:
         print(f"Error importing brightness controller: {e}")
@@ -59,6 +59,15 @@ install_python_deps() {
     fi
 }
 
+build_resources() {
+    # Compile the stylesheet into a GResource bundle; lumonitor.py falls back to the plain CSS file
+    if command -v glib-compile-resources &> /dev/null; then
+        glib-compile-resources --sourcedir="$1" --target="$1/lumonitor.gresource" "$1/lumonitor.gresource.xml"
+    else
+        print_warning "glib-compile-resources not found, using plain CSS"
+    fi
+}
+
 install_system() {
     print_status "Installing system-wide..."
     
@@ -73,8 +82,15 @@ install_system() {
     
     # Copy files
     cp "$SCRIPT_DIR/lumonitor.py" "$INSTALL_DIR/"
+    cp "$SCRIPT_DIR/brightness.py" "$INSTALL_DIR/"
+    cp "$SCRIPT_DIR/lumonitor_cli.py" "$INSTALL_DIR/"
+    cp "$SCRIPT_DIR/ddc_helper.py" "$INSTALL_DIR/"
+    cp "$SCRIPT_DIR/lumonitor_daemon.py" "$INSTALL_DIR/"
+    cp "$SCRIPT_DIR/lumonitor-client" "$INSTALL_DIR/"
     cp "$SCRIPT_DIR/requirements.txt" "$INSTALL_DIR/"
-    chmod +x "$INSTALL_DIR/lumonitor.py"
+    cp -r "$SCRIPT_DIR/data" "$INSTALL_DIR/"
+    build_resources "$INSTALL_DIR/data"
+    chmod +x "$INSTALL_DIR/lumonitor.py" "$INSTALL_DIR/lumonitor_cli.py" "$INSTALL_DIR/lumonitor-client"
     
     # Create desktop file
     cat > "$DESKTOP_FILE" << EOF
@@ -100,7 +116,8 @@ install_local() {
     print_status "Installing locally for user $USER..."
     
     # Make script executable
-    chmod +x "$SCRIPT_DIR/lumonitor.py"
+    chmod +x "$SCRIPT_DIR/lumonitor.py" "$SCRIPT_DIR/lumonitor_cli.py" "$SCRIPT_DIR/lumonitor-client"
+    build_resources "$SCRIPT_DIR/data"
     
     # Create local applications directory
     mkdir -p "$(dirname "$LOCAL_DESKTOP")"
@@ -4,305 +4,89 @@ Lumonitor - Brightness Control Utility for Linux
 A lightweight, desktop environment agnostic brightness controller
 """
 
-import gi
-gi.require_version('Gtk', '3.0')
-gi.require_version('AppIndicator3', '0.1')
-
-from gi.repository import Gtk, Gdk, GLib, AppIndicator3
-import subprocess
-import json
-import os
-import re
-from typing import List, Dict, Optional
+from typing import Dict
 import argparse
+import sys
 from pathlib import Path
 import threading
 from queue import Queue
-import time
 
+from brightness import BrightnessController
+from lumonitor_cli import add_brightness_arguments, run as run_cli, try_fast_path
+from lumonitor_daemon import get_controller, serve
 
-class BrightnessController:
-    """Handles brightness control operations using ddcutil and xrandr fallback"""
-    
-    def __init__(self):
-        self.use_ddcutil = self.check_ddcutil_available()
-        self.monitors = self.get_monitors()
-        self.brightness_cache = {}
-        self.cache_dir = Path.home() / '.cache' / 'lumonitor'
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Thread-safe queue for brightness changes
-        self.pending_changes = {}  # monitor -> (brightness, timestamp)
-        self.change_lock = threading.Lock()
-        self.worker_thread = None
-        self.running = True
-        
-        # Start background worker
-        self._start_worker()
-        
-    def _start_worker(self):
-        """Start background worker thread for applying brightness changes"""
-        self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-        self.worker_thread.start()
-    
-    def _worker_loop(self):
-        """Background worker that applies brightness changes"""
-        while self.running:
-            time.sleep(0.05)  # Check every 50ms
-            
-            with self.change_lock:
-                if not self.pending_changes:
-                    continue
-                    
-                # Process all pending changes
-                to_apply = dict(self.pending_changes)
-                self.pending_changes.clear()
-            
-            # Apply changes outside the lock (can be slow)
-            for monitor, (brightness, _) in to_apply.items():
-                self._apply_brightness_hardware(monitor, brightness)
-        
-    def _get_cache_file(self, monitor: str) -> Path:
-        """Get cache file path for a monitor"""
-        # Sanitize monitor name for filename
-        safe_name = monitor.replace('/', '_').replace(' ', '_')
-        return self.cache_dir / f'brightness_{safe_name}'
-    
-    def _read_cached_brightness(self, monitor: str) -> Optional[float]:
-        """Read brightness from cache file"""
-        cache_file = self._get_cache_file(monitor)
-        try:
-            if cache_file.exists():
-                value = float(cache_file.read_text().strip())
-                return max(0.0, min(1.0, value))
-        except (ValueError, IOError):
-            pass
-        return None
-    
-    def _write_cached_brightness(self, monitor: str, brightness: float):
-        """Write brightness to cache file"""
-        cache_file = self._get_cache_file(monitor)
-        try:
-            cache_file.write_text(f"{brightness:.2f}\n")
-        except IOError:
-            pass
-        
-    def check_ddcutil_available(self) -> bool:
-        """Check if ddcutil is available and working"""
-        try:
-            # Try with sudo first
-            result = subprocess.run(['sudo', 'ddcutil', 'detect'], 
-                                  capture_output=True, text=True, check=True)
-            # Check if any displays found
-            if "Display 1" in result.stdout or "Display 2" in result.stdout:
-                return True
-            return False
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
-        
-    def get_monitors(self) -> List[Dict[str, str]]:
-        """Get list of available monitors"""
-        if self.use_ddcutil:
-            return self.get_ddcutil_monitors()
-        else:
-            return self.get_xrandr_monitors()
-    
-    def get_ddcutil_monitors(self) -> List[Dict[str, str]]:
-        """Get monitors using ddcutil with sudo"""
-        try:
-            result = subprocess.run(['sudo', 'ddcutil', 'detect'], 
-                                  capture_output=True, text=True, check=True)
-            monitors = []
-            
-            current_display = None
-            display_num = None
-            for line in result.stdout.split('\n'):
-                if line.startswith('Display '):
-                    # Extract display number: "Display 1"
-                    display_num = line.split()[1]
-                    current_display = f"display-{display_num}"
-                elif 'Model:' in line and current_display and display_num:
-                    # Extract model name
-                    model = line.split('Model:')[1].strip()
-                    monitors.append({
-                        'name': current_display,
-                        'display_name': f"{model} (Display {display_num})",
-                        'ddcutil_id': display_num
-                    })
-                    current_display = None
-                    display_num = None
-            
-            return monitors
-        except subprocess.CalledProcessError:
-            # Fallback to xrandr if ddcutil fails
-            return self.get_xrandr_monitors()
-    
-    def get_xrandr_monitors(self) -> List[Dict[str, str]]:
-        """Get monitors using xrandr (fallback method)"""
-        try:
-            result = subprocess.run(['xrandr', '--listmonitors'], 
-                                  capture_output=True, text=True, check=True)
-            monitors = []
-            
-            for line in result.stdout.split('\n')[1:]:  # Skip header
-                if line.strip():
-                    parts = line.strip().split()
-                    if len(parts) >= 4:
-                        monitor_name = parts[3]
-                        monitors.append({
-                            'name': monitor_name,
-                            'display_name': monitor_name.replace('-', ' ').title(),
-                            'ddcutil_id': None
-                        })
-            
-            return monitors
-        except subprocess.CalledProcessError:
-            # Fallback to basic xrandr output parsing
-            try:
-                result = subprocess.run(['xrandr'], capture_output=True, text=True, check=True)
-                monitors = []
-                for line in result.stdout.split('\n'):
-                    if ' connected' in line:
-                        monitor_name = line.split()[0]
-                        monitors.append({
-                            'name': monitor_name,
-                            'display_name': monitor_name.replace('-', ' ').title(),
-                            'ddcutil_id': None
-                        })
-                return monitors
-            except subprocess.CalledProcessError:
-                return [{'name': 'default', 'display_name': 'Default Monitor', 'ddcutil_id': None}]
-    
-    def get_brightness(self, monitor: str) -> float:
-        """Get current brightness for a monitor (0.0 to 1.0)"""
-        # İlk önce cache'i kontrol et
-        cached = self._read_cached_brightness(monitor)
-        if cached is not None:
-            return cached
-        
-        # Cache yoksa ddcutil veya xrandr'dan oku
-        if self.use_ddcutil:
-            brightness = self.get_ddcutil_brightness(monitor)
-        else:
-            brightness = self.brightness_cache.get(monitor, 1.0)
-        
-        # Cache'e yaz
-        self._write_cached_brightness(monitor, brightness)
-        return brightness
-    
-    def get_ddcutil_brightness(self, monitor: str) -> float:
-        """Get brightness using ddcutil with sudo"""
-        try:
-            # Find ddcutil_id for this monitor
-            ddcutil_id = None
-            for mon in self.monitors:
-                if mon['name'] == monitor:
-                    ddcutil_id = mon.get('ddcutil_id')
-                    break
-            
-            if not ddcutil_id:
-                return self.brightness_cache.get(monitor, 1.0)
-            
-            # Get brightness using VCP code 10 (brightness) with sudo
-            result = subprocess.run(['sudo', 'ddcutil', '--display', ddcutil_id, 'getvcp', '10'], 
-                                  capture_output=True, text=True, check=True)
-            
-            # Parse output: "VCP code 0x10 (Brightness): current value = 80, max value = 100"
-            for line in result.stdout.split('\n'):
-                if 'current value' in line:
-                    parts = line.split('current value = ')[1]
-                    current = int(parts.split(',')[0])
-                    max_val = int(parts.split('max value = ')[1])
-                    brightness = current / max_val
-                    self.brightness_cache[monitor] = brightness
-                    return brightness
-                    
-        except (subprocess.CalledProcessError, ValueError, IndexError):
-            pass
-        
-        return self.brightness_cache.get(monitor, 1.0)
-    
-    def set_brightness(self, monitor: str, brightness: float):
-        """Set brightness for a monitor (0.0 to 1.0) - immediate cache update, async hardware"""
-        # Clamp brightness between 0.1 and 1.0
-        brightness = max(0.1, min(1.0, brightness))
-        
-        # İlk önce cache'e yaz (anında UI response)
-        self._write_cached_brightness(monitor, brightness)
-        
-        # Memory cache'i de güncelle
-        self.brightness_cache[monitor] = brightness
-        
-        # Hardware değişikliğini queue'ya ekle (async)
-        with self.change_lock:
-            self.pending_changes[monitor] = (brightness, time.time())
-        
-        return True
-    
-    def _apply_brightness_hardware(self, monitor: str, brightness: float):
-        """Actually apply brightness to hardware (called from worker thread)"""
-        if self.use_ddcutil:
-            self.set_ddcutil_brightness(monitor, brightness)
-        else:
-            self.set_xrandr_brightness(monitor, brightness)
-    
-    def set_ddcutil_brightness(self, monitor: str, brightness: float) -> bool:
-        """Set brightness using ddcutil with sudo"""
-        try:
-            # Find ddcutil_id for this monitor
-            ddcutil_id = None
-            for mon in self.monitors:
-                if mon['name'] == monitor:
-                    ddcutil_id = mon.get('ddcutil_id')
-                    break
-            
-            if not ddcutil_id:
-                return False
-            
-            # Convert 0.0-1.0 to 0-100 scale
-            brightness_percent = int(brightness * 100)
-            
-            # Set brightness using VCP code 10 (brightness) with sudo
-            subprocess.run(['sudo', 'ddcutil', '--display', ddcutil_id, 'setvcp', '10', str(brightness_percent)], 
-                          check=True, capture_output=True)
-            
-            # Başarılı olursa memory cache'i de güncelle
-            self.brightness_cache[monitor] = brightness
-            return True
-            
-        except subprocess.CalledProcessError as e:
-            print(f"ddcutil error setting brightness: {e}")
-            return False
-    
-    def set_xrandr_brightness(self, monitor: str, brightness: float) -> bool:
-        """Set brightness using xrandr (software-only)"""
-        try:
-            subprocess.run(['xrandr', '--output', monitor, '--brightness', str(brightness)], 
-                          check=True)
-            # Memory cache'i güncelle
-            self.brightness_cache[monitor] = brightness
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"xrandr error setting brightness: {e}")
-            return False
+# GTK is imported on first use so CLI invocations never load it
+Gtk = Gdk = GLib = Gio = AppIndicator3 = None
+
+
+def _import_gtk():
+    """Import the GTK bindings used by the GUI"""
+    global Gtk, Gdk, GLib, Gio
+    if Gtk is None:
+        import gi
+        gi.require_version('Gtk', '3.0')
+        from gi.repository import Gtk, Gdk, GLib, Gio
+
+
+def _import_app_indicator():
+    """Import AppIndicator3 for the tray icon"""
+    global AppIndicator3
+    if AppIndicator3 is None:
+        import gi
+        gi.require_version('AppIndicator3', '0.1')
+        from gi.repository import AppIndicator3
+
+
+# Stylesheet lives in data/; the compiled .gresource is preferred when installed
+_DATA_DIR = Path(__file__).resolve().parent / 'data'
 
 
 class LumonitorGUI:
     """Main GUI application using GTK"""
     
+    _css_applied = False
+    
     def __init__(self, brightness_controller: BrightnessController):
+        _import_gtk()
+        # Styles must be in place before the first widget is realized
+        self._apply_css()
         self.brightness_controller = brightness_controller
         self.window = None
         self.sliders = {}
         self.is_updating = False
         
-        # Debounce mechanism for slider changes
+        # Slider changes are coalesced and flushed once the main loop is idle
         self.pending_changes = {}  # monitor_name -> brightness_value
-        self.change_timers = {}    # monitor_name -> timer_id
-        self.debounce_delay = 500  # milliseconds - increased for smoother feel
+        self._flush_source_id = None  # one shared GLib source flushes every monitor
+        self._last_sent = {}  # monitor_name -> brightness last handed to the controller
+        self.min_delta = 0.02  # smaller drag steps are skipped until release
+        
+        # Hardware reads (ddcutil getvcp) run on a worker so the UI never blocks
+        self._io_queue = Queue()
+        self._awaiting_load = set()  # sliders still showing a placeholder value
+        threading.Thread(target=self._io_worker, daemon=True).start()
         
         self.setup_window()
     
+    @classmethod
+    def _apply_css(cls):
+        """Register the application stylesheet for the default screen once"""
+        if cls._css_applied:
+            return
+        css_provider = Gtk.CssProvider()
+        try:
+            Gio.Resource.load(str(_DATA_DIR / 'lumonitor.gresource'))._register()
+            css_provider.load_from_resource('/lumonitor/lumonitor.css')
+        except GLib.Error:
+            # Running from a source checkout without the compiled resource bundle
+            css_provider.load_from_path(str(_DATA_DIR / 'lumonitor.css'))
+        Gtk.StyleContext.add_provider_for_screen(
+            Gdk.Screen.get_default(),
+            css_provider,
+            Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+        )
+        cls._css_applied = True
+    
     def setup_window(self):
         """Create and setup the main window"""
         self.window = Gtk.Window(title="Lumonitor")
@@ -313,9 +97,6 @@ class LumonitorGUI:
         # Modern window styling
         self.window.set_resizable(False)
         
-        # Modern window styling
-        self.window.set_resizable(False)
-        
         # Main container with padding
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         self.window.add(main_box)
@@ -356,13 +137,16 @@ class LumonitorGUI:
         content.set_margin_bottom(24)
         main_box.pack_start(content, True, True, 0)
         
-        content.set_margin_bottom(24)
-        main_box.pack_start(content, True, True, 0)
-        
-        # Monitors section
-        for monitor in self.brightness_controller.monitors:
-            monitor_frame = self.create_monitor_control(monitor)
-            content.pack_start(monitor_frame, False, False, 0)
+        # Monitors section, filled in once hardware detection has finished
+        self._monitor_box = content
+        self._loading_label = None
+        if self.brightness_controller.ready.is_set():
+            self.populate_monitors()
+        else:
+            self._loading_label = Gtk.Label(label="Detecting monitors…")
+            self._loading_label.set_name("monitor-label")
+            content.pack_start(self._loading_label, False, False, 0)
+            self.brightness_controller.when_ready(lambda: GLib.idle_add(self.populate_monitors))
         
         # Footer with buttons
         footer = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
@@ -393,6 +177,18 @@ class LumonitorGUI:
         close_btn.connect("clicked", self.on_close_clicked)
         footer.pack_start(close_btn, False, False, 0)
     
+    def populate_monitors(self):
+        """Add a slider card for every detected monitor that does not have one yet"""
+        if self._loading_label is not None:
+            self._loading_label.destroy()
+            self._loading_label = None
+        for monitor in self.brightness_controller.monitors:
+            if monitor['name'] not in self.sliders:
+                monitor_frame = self.create_monitor_control(monitor)
+                self._monitor_box.pack_start(monitor_frame, False, False, 0)
+        self._monitor_box.show_all()
+        return False  # Remove idle source
+    
     def create_monitor_control(self, monitor: Dict[str, str]):
         """Create brightness control for a single monitor"""
         # Card container
@@ -416,19 +212,25 @@ class LumonitorGUI:
         
         # Slider
         adjustment = Gtk.Adjustment(value=100, lower=10, upper=100, 
-                                  step_increment=1, page_increment=10)
+                                  step_increment=2, page_increment=10)
         slider = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL, adjustment=adjustment)
         slider.set_name("brightness-slider")
         slider.set_digits(0)
+        # Whole percents only, so sub-pixel drags do not emit value-changed
+        slider.set_round_digits(0)
         slider.set_value_pos(Gtk.PositionType.RIGHT)
         slider.set_draw_value(True)
         slider.set_hexpand(True)
         
-        # Get current brightness and set slider
-        current_brightness = self.brightness_controller.get_brightness(monitor['name'])
+        # Use the cached brightness if there is one, otherwise read hardware in the background
+        current_brightness = self.brightness_controller.peek_brightness(monitor['name'])
+        if current_brightness is None:
+            current_brightness = 1.0
+            self._load_brightness(monitor['name'])
         slider.set_value(current_brightness * 100)
         
         slider.connect("value-changed", self.on_brightness_changed, monitor['name'])
+        slider.connect("button-release-event", self.on_slider_released, monitor['name'])
         slider_box.pack_start(slider, True, True, 0)
         
         self.sliders[monitor['name']] = slider
@@ -436,63 +238,89 @@ class LumonitorGUI:
         return card
     
     def on_brightness_changed(self, slider, monitor_name):
-        """Handle brightness slider change with debounce"""
+        """Handle brightness slider change, coalescing bursts until the main loop is idle"""
         if self.is_updating:
             return
+        self._awaiting_load.discard(monitor_name)
         
-        # Update UI immediately for smooth feel
         brightness = slider.get_value() / 100.0
-        
-        # Store the pending change
+        last = self.pending_changes.get(monitor_name, self._last_sent.get(monitor_name))
+        if last is not None and round(abs(brightness - last), 2) < self.min_delta:
+            # Released drags are sent exactly by on_slider_released
+            return
+        self._queue_change(monitor_name, brightness)
+    
+    def on_slider_released(self, slider, event, monitor_name):
+        """Send the exact final value of a drag, even if it is below the delta filter"""
+        if not self.is_updating:
+            brightness = slider.get_value() / 100.0
+            if brightness != self._last_sent.get(monitor_name):
+                self._queue_change(monitor_name, brightness)
+        return False  # Let GtkRange finish the release
+    
+    def _queue_change(self, monitor_name, brightness):
+        """Store the pending change; only the latest value per monitor is kept"""
         self.pending_changes[monitor_name] = brightness
         
-        # Cancel previous timer for this monitor
-        if monitor_name in self.change_timers:
-            GLib.source_remove(self.change_timers[monitor_name])
-        
-        # Set new timer for debounced change
-        self.change_timers[monitor_name] = GLib.timeout_add(
-            self.debounce_delay, 
-            self.apply_brightness_change, 
-            monitor_name
-        )
+        if self._flush_source_id is None:
+            self._flush_source_id = GLib.idle_add(self._flush_pending, priority=GLib.PRIORITY_LOW)
     
-    def apply_brightness_change(self, monitor_name):
-        """Apply the actual brightness change after debounce delay"""
-        if monitor_name not in self.pending_changes:
-            return False  # Remove timer
-        
-        brightness = self.pending_changes[monitor_name]
+    def _flush_pending(self):
+        """Apply every pending slider change in one pass"""
+        pending, self.pending_changes = self.pending_changes, {}
+        self._flush_source_id = None
+        for monitor_name, brightness in pending.items():
+            self.apply_brightness_change(monitor_name, brightness)
+        return False  # Remove idle source
+    
+    def apply_brightness_change(self, monitor_name, brightness):
+        """Apply a brightness change for one monitor"""
         success = self.brightness_controller.set_brightness(monitor_name, brightness)
+        self._last_sent[monitor_name] = brightness
         
         if not success:
             # Reset slider on failure
+            self._load_brightness(monitor_name)
+    
+    def _load_brightness(self, monitor_name):
+        """Queue a hardware read whose result is shown on the monitor's slider"""
+        self._awaiting_load.add(monitor_name)
+        self._io_queue.put(monitor_name)
+    
+    def _io_worker(self):
+        """Run blocking brightness reads off the GTK main thread"""
+        while True:
+            monitor_name = self._io_queue.get()
+            try:
+                brightness = self.brightness_controller.get_brightness(monitor_name)
+            except Exception as e:
+                print(f"Error reading brightness for {monitor_name}: {e}")
+                continue
+            GLib.idle_add(self._show_brightness, monitor_name, brightness)
+    
+    def _show_brightness(self, monitor_name, brightness):
+        """Move a slider to a loaded value unless the user has moved it since"""
+        if monitor_name in self._awaiting_load and monitor_name in self.sliders:
+            self._awaiting_load.discard(monitor_name)
             self.is_updating = True
-            old_brightness = self.brightness_controller.get_brightness(monitor_name)
-            if monitor_name in self.sliders:
-                self.sliders[monitor_name].set_value(old_brightness * 100)
+            self.sliders[monitor_name].set_value(brightness * 100)
             self.is_updating = False
-        
-        # Clean up
-        if monitor_name in self.pending_changes:
-            del self.pending_changes[monitor_name]
-        if monitor_name in self.change_timers:
-            del self.change_timers[monitor_name]
-        
-        return False  # Remove timer
+        return False  # Remove idle source
     
     def on_reset_clicked(self, button):
         """Reset all monitors to 100% brightness"""
         # Cancel all pending changes
-        for monitor_name in list(self.change_timers.keys()):
-            GLib.source_remove(self.change_timers[monitor_name])
-            del self.change_timers[monitor_name]
         self.pending_changes.clear()
+        if self._flush_source_id is not None:
+            GLib.source_remove(self._flush_source_id)
+            self._flush_source_id = None
         
         # Apply reset immediately
         self.is_updating = True
+        self.brightness_controller.set_brightness_many(
+            {monitor['name']: 1.0 for monitor in self.brightness_controller.monitors})
         for monitor in self.brightness_controller.monitors:
-            self.brightness_controller.set_brightness(monitor['name'], 1.0)
+            self._last_sent[monitor['name']] = 1.0
             if monitor['name'] in self.sliders:
                 self.sliders[monitor['name']].set_value(100)
         self.is_updating = False
@@ -523,6 +351,8 @@ class LumonitorTray:
     """System tray integration using AppIndicator"""
     
     def __init__(self, gui: LumonitorGUI, brightness_controller: BrightnessController):
+        _import_gtk()
+        _import_app_indicator()
         self.gui = gui
         self.brightness_controller = brightness_controller
         
@@ -576,8 +406,8 @@ class LumonitorTray:
     def on_quick_brightness(self, item, level):
         """Set brightness to a specific level for all monitors"""
         brightness = level / 100.0
-        for monitor in self.brightness_controller.monitors:
-            self.brightness_controller.set_brightness(monitor['name'], brightness)
+        self.brightness_controller.set_brightness_many(
+            {monitor['name']: brightness for monitor in self.brightness_controller.monitors})
     
     def on_quit(self, item):
         """Quit the application"""
@@ -587,256 +417,75 @@ class LumonitorTray:
 class Lumonitor:
     """Main application class"""
     
-    def __init__(self, show_tray=True, start_minimized=False):
-        self.brightness_controller = BrightnessController()
+    def __init__(self, show_tray=True, start_minimized=False, redetect=False):
+        _import_gtk()
+        # Detection runs in the background so the window appears immediately
+        self.brightness_controller = BrightnessController(redetect=redetect, background_probe=True,
+                                                     long_lived=True)
         self.gui = LumonitorGUI(self.brightness_controller)
         self.start_minimized = start_minimized
         
+        self.tray = None
         if show_tray:
-            self.tray = LumonitorTray(self.gui, self.brightness_controller)
-        else:
-            self.tray = None
+            try:
+                self.tray = LumonitorTray(self.gui, self.brightness_controller)
+            except (ImportError, ValueError) as e:
+                # No AppIndicator typelib (e.g. libayatana missing); run as a plain window
+                print(f"System tray unavailable: {e}")
+        if self.tray is None:
+            # Nothing to restore a minimized window from
+            self.start_minimized = False
+        
+        # Outputs were (un)plugged, so the persisted xrandr layout is stale
+        Gdk.Screen.get_default().connect(
+            'monitors-changed', lambda screen: self.brightness_controller.invalidate_xrandr_cache())
     
     def run(self):
         """Run the application"""
         if not self.start_minimized:
             self.gui.show()
         
-        # Modern shadcn-inspired CSS
-        css_provider = Gtk.CssProvider()
-        css_provider.load_from_data(b"""
-            /* Modern color palette - shadcn inspired */
-            window {
-                background-color: #fafafa;
-            }
-            
-            #header {
-                background: linear-gradient(to bottom, #ffffff 0%, #fafafa 100%);
-            }
-            
-            #header-separator {
-                background-color: #e5e5e5;
-                min-height: 1px;
-            }
-            
-            /* Card styling - subtle shadow, rounded corners */
-            #card {
-                background-color: #ffffff;
-                border-radius: 12px;
-                padding: 20px;
-                border: 1px solid #e5e5e5;
-                box-shadow: 0 1px 3px rgba(0, 0, 0, 0.04);
-            }
-            
-            #card:hover {
-                border-color: #d4d4d4;
-                box-shadow: 0 2px 6px rgba(0, 0, 0, 0.06);
-                transition: all 150ms ease;
-            }
-            
-            /* Monitor label */
-            #monitor-label {
-                color: #18181b;
-                font-weight: 600;
-                font-size: 14px;
-            }
-            
-            /* Slider styling - modern accent */
-            #brightness-slider slider {
-                background-color: #18181b;
-                border-radius: 8px;
-                min-width: 18px;
-                min-height: 18px;
-                margin: -7px;
-                transition: all 100ms ease;
-            }
-            
-            #brightness-slider slider:hover {
-                background-color: #3b82f6;
-                min-width: 20px;
-                min-height: 20px;
-            }
-            
-            #brightness-slider trough {
-                background-color: #e5e5e5;
-                border-radius: 8px;
-                min-height: 4px;
-            }
-            
-            #brightness-slider highlight {
-                background: linear-gradient(90deg, #3b82f6 0%, #2563eb 100%);
-                border-radius: 8px;
-                transition: all 100ms ease;
-            }
-            
-            #brightness-slider value {
-                color: #71717a;
-                font-size: 13px;
-                font-weight: 500;
-            }
-            
-            /* Button styles - shadcn inspired */
-            button {
-                border-radius: 8px;
-                padding: 8px 16px;
-                font-weight: 500;
-                font-size: 14px;
-                min-height: 36px;
-                transition: all 150ms ease;
-            }
-            
-            #secondary-button {
-                background: #f4f4f5;
-                color: #18181b;
-                border: 1px solid #e4e4e7;
-            }
-            
-            #secondary-button:hover {
-                background: #e4e4e7;
-                border-color: #d4d4d8;
-            }
-            
-            #secondary-button:active {
-                background: #d4d4d8;
-            }
-            
-            #ghost-button {
-                background: transparent;
-                color: #71717a;
-                border: none;
-            }
-            
-            #ghost-button:hover {
-                background: #f4f4f5;
-                color: #18181b;
-            }
-            
-            #ghost-button:active {
-                background: #e4e4e7;
-            }
-            
-            /* Dialog specific styles */
-            #dialog-header {
-                background: linear-gradient(to bottom, #ffffff 0%, #fafafa 100%);
-            }
-            
-            #dialog-separator {
-                background-color: #e5e5e5;
-                min-height: 1px;
-            }
-            
-            #shortcut-label {
-                color: #18181b;
-                font-weight: 500;
-                font-size: 13px;
-            }
-            
-            #shortcut-entry {
-                border-radius: 8px;
-                border: 1px solid #e4e4e7;
-                padding: 8px 12px;
-                background-color: #ffffff;
-                font-size: 13px;
-                min-height: 36px;
-            }
-            
-            #shortcut-entry:focus {
-                border-color: #3b82f6;
-                box-shadow: 0 0 0 3px rgba(59, 130, 246, 0.1);
-            }
-            
-            /* Primary button - accent */
-            #primary-button {
-                background: linear-gradient(to bottom, #3b82f6 0%, #2563eb 100%);
-                color: #ffffff;
-                border: none;
-                font-weight: 600;
-            }
-            
-            #primary-button:hover {
-                background: linear-gradient(to bottom, #2563eb 0%, #1d4ed8 100%);
-            }
-            
-            #primary-button:active {
-                background: #1d4ed8;
-            }
-            
-            /* Destructive button - red */
-            #destructive-button {
-                background: transparent;
-                color: #dc2626;
-                border: 1px solid #fca5a5;
-            }
-            
-            #destructive-button:hover {
-                background: #fef2f2;
-                border-color: #f87171;
-            }
-            
-            #destructive-button:active {
-                background: #fee2e2;
-            }
-        """)
-        
-        Gtk.StyleContext.add_provider_for_screen(
-            Gdk.Screen.get_default(),
-            css_provider,
-            Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
-        )
-        
         try:
             Gtk.main()
         except KeyboardInterrupt:
             print("\nExiting...")
+        finally:
+            self.brightness_controller.close()
 
 
 def main():
     """Main entry point"""
+    # One-shot '--brightness LEVEL' skips argparse entirely
+    if try_fast_path(sys.argv[1:]):
+        return
+    
     parser = argparse.ArgumentParser(description="Lumonitor - Brightness Control Utility")
     parser.add_argument("--no-tray", action="store_true", 
                        help="Disable system tray integration")
-    parser.add_argument("--brightness", type=float, metavar="LEVEL",
-                       help="Set brightness level (0.1 to 1.0) and exit")
-    parser.add_argument("--brightness-step", type=str, metavar="STEP",
-                       help="Adjust brightness by step (+0.1, -0.1) and exit")
-    parser.add_argument("--monitor", type=str, metavar="NAME",
-                       help="Specify monitor name (use with --brightness)")
+    add_brightness_arguments(parser)
     parser.add_argument("--minimized", action="store_true",
                        help="Start minimized to system tray")
+    parser.add_argument("--daemon", action="store_true",
+                       help="Run headless and serve brightness commands on a Unix socket")
     
     args = parser.parse_args()
     
     # Command line brightness setting
     if args.brightness is not None or args.brightness_step is not None:
-        controller = BrightnessController()
-        monitors = [args.monitor] if args.monitor else [m['name'] for m in controller.monitors]
-        
-        for monitor in monitors:
-            if args.brightness is not None:
-                # Set absolute brightness
-                success = controller.set_brightness(monitor, args.brightness)
-                if success:
-                    print(f"Set brightness for {monitor} to {args.brightness * 100:.0f}%")
-                else:
-                    print(f"Failed to set brightness for {monitor}")
-            
-            elif args.brightness_step is not None:
-                # Adjust brightness by step
-                try:
-                    step = float(args.brightness_step)
-                    current = controller.get_brightness(monitor)
-                    new_brightness = max(0.1, min(1.0, current + step))
-                    success = controller.set_brightness(monitor, new_brightness)
-                    if success:
-                        print(f"Adjusted brightness for {monitor} to {new_brightness * 100:.0f}%")
-                    else:
-                        print(f"Failed to adjust brightness for {monitor}")
-                except ValueError:
-                    print(f"Invalid brightness step: {args.brightness_step}")
+        run_cli(args)
+        return
+    
+    if args.daemon:
+        # Headless: hotkeys and lumonitor-client talk to this process over the socket
+        brightness_controller = get_controller(redetect=args.redetect)
+        try:
+            serve(brightness_controller)
+        finally:
+            brightness_controller.close()
         return
     
     # GUI mode
-    app = Lumonitor(show_tray=not args.no_tray, start_minimized=args.minimized)
+    app = Lumonitor(show_tray=not args.no_tray, start_minimized=args.minimized, redetect=args.redetect)
     app.run()
 
 
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Lumonitor Command Line Interface
+One-shot brightness changes without loading GTK
+"""
+
+import argparse
+import functools
+import sys
+from typing import List, Optional
+
+from brightness import BrightnessController, clamp_brightness
+from lumonitor_daemon import parse_reply, send_command
+
+
+def add_brightness_arguments(parser: argparse.ArgumentParser):
+    """Register the one-shot brightness options on a parser"""
+    parser.add_argument("--brightness", type=float, metavar="LEVEL",
+                       help="Set brightness level (0.1 to 1.0) and exit")
+    parser.add_argument("--brightness-step", type=str, metavar="STEP",
+                       help="Adjust brightness by step (+0.1, -0.1) and exit")
+    parser.add_argument("--monitor", type=str, metavar="NAME",
+                       help="Specify monitor name (use with --brightness)")
+    parser.add_argument("--redetect", action="store_true",
+                       help="Ignore the cached monitor list and run ddcutil detect again")
+
+
+@functools.lru_cache(maxsize=None)
+def _percent(brightness: float) -> str:
+    """Format a brightness level as a whole percentage, e.g. '60%'"""
+    return f"{brightness * 100:.0f}%"
+
+
+def apply_brightness(brightness: Optional[float] = None, brightness_step: Optional[str] = None,
+                     monitor: Optional[str] = None, redetect: bool = False):
+    """Set or step brightness on one monitor, or on all of them when monitor is None"""
+    if not redetect and _apply_through_daemon(brightness, brightness_step, monitor):
+        return
+    
+    controller = BrightnessController(redetect=redetect)
+    monitors = [monitor] if monitor else [m['name'] for m in controller.monitors]
+    
+    # Collect the report and write it once instead of one print per monitor
+    out = []
+    if brightness is not None:
+        # Set absolute brightness on every monitor with one batch
+        results = controller.set_brightness_many({monitor: brightness for monitor in monitors})
+        for monitor, success in results.items():
+            if success:
+                out.append(f"Set brightness for {monitor} to {_percent(brightness)}")
+            else:
+                out.append(f"Failed to set brightness for {monitor}")
+    
+    elif brightness_step is not None:
+        # The step is the same for every monitor; parse it once
+        try:
+            step = float(brightness_step)
+        except ValueError:
+            out.append(f"Invalid brightness step: {brightness_step}")
+            monitors = []
+        
+        for monitor in monitors:
+            current = controller.get_brightness(monitor)
+            new_brightness = clamp_brightness(current + step)
+            success = controller.set_brightness(monitor, new_brightness)
+            if success:
+                out.append(f"Adjusted brightness for {monitor} to {_percent(new_brightness)}")
+            else:
+                out.append(f"Failed to adjust brightness for {monitor}")
+    
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
+        sys.stdout.flush()
+    
+    # Hardware writes are asynchronous; wait for them before the process exits
+    controller.close()
+
+
+def _apply_through_daemon(brightness: Optional[float], brightness_step: Optional[str],
+                          monitor: Optional[str]) -> bool:
+    """Hand the change to a running lumonitor daemon, False if none is listening"""
+    if brightness is not None:
+        command = f"set {brightness}"
+        verb = "Set"
+    elif brightness_step is not None:
+        command = f"step {brightness_step}"
+        verb = "Adjusted"
+    else:
+        return False
+    if monitor:
+        command += f" {monitor}"
+    
+    reply = send_command(command)
+    if reply is None:
+        return False
+    if not reply.startswith('ok'):
+        print(f"Daemon {reply}")
+        return True
+    out = [f"{verb} brightness for {name} to {percent}" for name, percent in parse_reply(reply).items()]
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
+        sys.stdout.flush()
+    return True
+
+
+def run(args: argparse.Namespace):
+    """Apply --brightness or --brightness-step from parsed arguments"""
+    apply_brightness(args.brightness, args.brightness_step, args.monitor, args.redetect)
+
+
+def try_fast_path(argv: List[str]) -> bool:
+    """Handle a bare '--brightness LEVEL' without building an argument parser"""
+    if len(argv) != 2 or argv[0] != '--brightness':
+        return False
+    try:
+        brightness = float(argv[1])
+    except ValueError:
+        return False  # Let argparse report the error
+    apply_brightness(brightness)
+    return True
+
+
+def main():
+    """Command line entry point"""
+    if try_fast_path(sys.argv[1:]):
+        return
+    
+    parser = argparse.ArgumentParser(description="Lumonitor - Brightness Control CLI")
+    add_brightness_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.brightness is None and args.brightness_step is None:
+        parser.error("one of --brightness or --brightness-step is required")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
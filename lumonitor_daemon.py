@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Lumonitor brightness daemon
+Keeps one BrightnessController alive and accepts one-line commands over a Unix socket,
+so hotkeys and the CLI skip interpreter startup and monitor detection
+
+Commands (one per connection, reply is a single line):
+    set LEVEL [MONITOR]    -> ok NAME=PCT ...
+    step DELTA [MONITOR]   -> ok NAME=PCT ...
+    reset [MONITOR]        -> ok NAME=PCT ...
+    invalidate             -> ok NAME ...   (re-detect monitors after a hotplug)
+"""
+
+import os
+import signal
+import socket
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+# lumonitor-client imports this module for the protocol helpers only; the
+# controller (and everything it pulls in) is loaded when a daemon needs it
+if TYPE_CHECKING:
+    from brightness import BrightnessController
+
+
+USAGE = "set LEVEL [MONITOR] | step DELTA [MONITOR] | reset [MONITOR] | invalidate"
+
+# One controller for the life of the daemon process
+_CONTROLLER: Optional['BrightnessController'] = None
+
+
+def get_controller(redetect: bool = False) -> 'BrightnessController':
+    """Process-wide BrightnessController, created on first use"""
+    from brightness import BrightnessController
+    global _CONTROLLER
+    if _CONTROLLER is None:
+        _CONTROLLER = BrightnessController(redetect=redetect, long_lived=True)
+    return _CONTROLLER
+
+
+def socket_path() -> str:
+    """Per-user socket location in the runtime directory"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or f'/run/user/{os.getuid()}'
+    return os.path.join(runtime_dir, 'lumonitor.sock')
+
+
+def send_command(command: str, timeout: float = 2.0, reply_timeout: float = 15.0,
+                 path: Optional[str] = None) -> Optional[str]:
+    """Send one command to a running daemon, None if no daemon is listening"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        try:
+            client.connect(path or socket_path())
+        except OSError:
+            return None
+        # From here on the daemon may already be acting on the command, so a failure
+        # is reported instead of letting the caller replay it through the CLI
+        try:
+            client.settimeout(reply_timeout)
+            client.sendall(command.encode() + b"\n")
+            client.shutdown(socket.SHUT_WR)
+            reply = b''
+            while not reply.endswith(b"\n"):
+                chunk = client.recv(4096)
+                if not chunk:
+                    break
+                reply += chunk
+        except OSError as e:
+            return f"error no reply from daemon: {e}"
+    return reply.decode(errors='replace').strip() or "error daemon closed the connection"
+
+
+def parse_reply(reply: str) -> Dict[str, str]:
+    """Map monitor name -> percentage from an 'ok NAME=PCT ...' reply"""
+    return dict(item.split('=', 1) for item in reply.split()[1:] if '=' in item)
+
+
+def parse_command(parts: List[str]) -> Tuple[str, Optional[float], Optional[str]]:
+    """Split a command into (verb, value, monitor), ValueError describes bad input"""
+    if not parts:
+        raise ValueError("empty command")
+    command, args = parts[0], parts[1:]
+    if command not in ('set', 'step', 'reset', 'invalidate'):
+        raise ValueError(f"unknown command: {command}")
+
+    # set and step take a value before the optional monitor, reset only the monitor
+    value_args = 1 if command in ('set', 'step') else 0
+    max_args = 0 if command == 'invalidate' else value_args + 1
+    if len(args) < value_args:
+        raise ValueError(f"missing value for {command}")
+    if len(args) > max_args:
+        raise ValueError(f"too many arguments for {command}")
+    try:
+        value = float(args[0]) if value_args else None
+    except ValueError:
+        raise ValueError(f"invalid value: {args[0]}") from None
+    monitor = args[value_args] if len(args) > value_args else None
+    return command, value, monitor
+
+
+def handle_command(controller: 'BrightnessController', line: str) -> str:
+    """Execute one command line and return the reply line"""
+    from brightness import clamp_brightness
+    try:
+        command, value, monitor = parse_command(line.split())
+    except ValueError as e:
+        return f"error {e}"
+    if command == 'invalidate':
+        controller.redetect()
+        return "ok " + " ".join(mon['name'] for mon in controller.monitors)
+
+    names = [mon['name'] for mon in controller.monitors]
+    if monitor is not None:
+        if monitor not in names:
+            return f"error unknown monitor: {monitor}"
+        names = [monitor]
+
+    # The GUI or the plain CLI may have changed a level since this daemon last did
+    for name in names:
+        controller.sync_cached_brightness(name)
+
+    if command == 'reset':
+        targets = {name: 1.0 for name in names}
+    elif command == 'set':
+        level = clamp_brightness(value)
+        targets = {name: level for name in names}
+    else:
+        targets = {name: clamp_brightness(controller.get_cached_brightness(name) + value)
+                   for name in names}
+
+    controller.set_brightness_many(targets)
+    return "ok " + " ".join(f"{name}={brightness * 100:.0f}%" for name, brightness in targets.items())
+
+
+def _raise_interrupt(signum, frame):
+    """Turn SIGTERM into the KeyboardInterrupt path so the socket is removed"""
+    raise KeyboardInterrupt
+
+
+def serve(controller: Optional['BrightnessController'] = None, path: Optional[str] = None):
+    """Answer commands on the Unix socket until interrupted"""
+    controller = controller or get_controller()
+    path = path or socket_path()
+    if send_command('', path=path) is not None:
+        print(f"Lumonitor daemon already running on {path}")
+        return
+
+    # Stale socket from a daemon that did not shut down cleanly
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(path)
+        os.chmod(path, 0o600)
+        server.listen(8)
+        print(f"Lumonitor daemon listening on {path}")
+
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                # A client that never sends its line must not stall the daemon
+                conn.settimeout(2.0)
+                try:
+                    line = conn.makefile('rb').readline().decode(errors='replace')
+                    conn.sendall(handle_command(controller, line).encode() + b"\n")
+                except OSError as e:
+                    print(f"Error handling daemon client: {e}")
+    except KeyboardInterrupt:
+        print("\nExiting daemon...")
+    finally:
+        server.close()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
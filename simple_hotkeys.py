@@ -4,6 +4,7 @@ Lumonitor Simple Hotkey Service
 Uses system keyboard shortcuts without complex dependencies
 """
 
+import ast
 import subprocess
 import time
 import os
@@ -12,6 +13,48 @@ import signal
 import threading
 from pathlib import Path
 
+from lumonitor_daemon import send_command
+
+
+MEDIA_KEYS_DIR = '/org/gnome/settings-daemon/plugins/media-keys/'
+MEDIA_KEYS_SCHEMA = 'org.gnome.settings-daemon.plugins.media-keys'
+CUSTOM_KEYBINDING_SCHEMA = MEDIA_KEYS_SCHEMA + '.custom-keybinding'
+
+# Resolved once at import; every hotkey reuses them
+_HERE = Path(__file__).resolve().parent
+_CLI_PATH = str(_HERE / 'lumonitor_cli.py')
+_CLIENT_PATH = str(_HERE / 'lumonitor-client')
+
+
+def _gvariant_string(value: str) -> str:
+    """Quote a Python string as a GVariant string literal for dconf"""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _parse_string_list(text: str) -> list:
+    """Parse a GVariant string array as printed by dconf/gsettings"""
+    text = text.strip()
+    if text.startswith('@as'):
+        text = text[3:].strip()
+    if not text:
+        return []
+    # Malformed input raises ValueError/SyntaxError rather than wiping the user's list
+    return [str(item) for item in ast.literal_eval(text)]
+
+
+def _load_gio():
+    """Gio from PyGObject when the media-keys schemas are installed, otherwise None"""
+    try:
+        import gi
+        from gi.repository import Gio
+    except (ImportError, ValueError):
+        return None
+    # Gio.Settings aborts the process on an unknown schema, so look it up first
+    source = Gio.SettingsSchemaSource.get_default()
+    if source is None or source.lookup(CUSTOM_KEYBINDING_SCHEMA, True) is None:
+        return None
+    return Gio
+
 
 class SimpleHotkeyService:
     """Simple hotkey service using system tools"""
@@ -19,47 +62,44 @@ class SimpleHotkeyService:
     def __init__(self):
         self.running = False
         self.step_size = 0.1
-        self.lumonitor_path = Path(__file__).parent / "lumonitor.py"
         
+    def _send(self, command: str, cli_args: list) -> bool:
+        """Send a command to the lumonitor daemon, falling back to a one-shot CLI run"""
+        reply = send_command(command)
+        if reply is not None:
+            if reply.startswith('ok'):
+                return True
+            print(f"❌ Error: {reply}")
+            return False
+        
+        # Only stderr is ever shown, and only decoded when the CLI failed
+        result = subprocess.run([sys.executable, _CLI_PATH] + cli_args, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            print(f"❌ Error: {result.stderr.decode(errors='replace')}")
+        return result.returncode == 0
+    
     def increase_brightness(self):
-        """Increase brightness using lumonitor CLI"""
+        """Increase brightness through the daemon"""
         try:
-            result = subprocess.run([
-                sys.executable, str(self.lumonitor_path), 
-                '--brightness', str(min(1.0, 0.1 + self.step_size))
-            ], capture_output=True, text=True)
-            if result.returncode == 0:
+            if self._send(f"step +{self.step_size}", ['--brightness-step', f"+{self.step_size}"]):
                 print("🔆 Brightness increased")
-            else:
-                print(f"❌ Error: {result.stderr}")
         except Exception as e:
             print(f"Error increasing brightness: {e}")
     
     def decrease_brightness(self):
-        """Decrease brightness using lumonitor CLI"""
+        """Decrease brightness through the daemon"""
         try:
-            result = subprocess.run([
-                sys.executable, str(self.lumonitor_path), 
-                '--brightness', str(max(0.1, 1.0 - self.step_size))
-            ], capture_output=True, text=True)
-            if result.returncode == 0:
+            if self._send(f"step -{self.step_size}", ['--brightness-step', f"-{self.step_size}"]):
                 print("🔅 Brightness decreased")
-            else:
-                print(f"❌ Error: {result.stderr}")
         except Exception as e:
             print(f"Error decreasing brightness: {e}")
     
     def reset_brightness(self):
         """Reset brightness to 100%"""
         try:
-            result = subprocess.run([
-                sys.executable, str(self.lumonitor_path), 
-                '--brightness', '1.0'
-            ], capture_output=True, text=True)
-            if result.returncode == 0:
+            if self._send("reset", ['--brightness', '1.0']):
                 print("🔆 Brightness reset to 100%")
-            else:
-                print(f"❌ Error: {result.stderr}")
         except Exception as e:
             print(f"Error resetting brightness: {e}")
     
@@ -68,107 +108,102 @@ class SimpleHotkeyService:
         shortcuts = [
             {
                 'name': 'lumonitor-increase',
-                'command': f'python3 {self.lumonitor_path} --brightness-step +0.1',
+                'command': f'{_CLIENT_PATH} step +0.1',
                 'binding': '<Super><Shift>Up'
             },
             {
                 'name': 'lumonitor-decrease', 
-                'command': f'python3 {self.lumonitor_path} --brightness-step -0.1',
+                'command': f'{_CLIENT_PATH} step -0.1',
                 'binding': '<Super><Shift>Down'
             },
             {
                 'name': 'lumonitor-reset',
-                'command': f'python3 {self.lumonitor_path} --brightness 1.0',
+                'command': f'{_CLIENT_PATH} reset',
                 'binding': '<Super><Shift>r'
             }
         ]
         
         print("Setting up GNOME keyboard shortcuts...")
-        for i, shortcut in enumerate(shortcuts):
-            try:
-                # Set command
-                subprocess.run([
-                    'gsettings', 'set', 
-                    f'org.gnome.settings-daemon.plugins.media-keys.custom-keybinding:/org/gnome/settings-daemon/plugins/media-keys/custom-keybindings/lumonitor{i}/',
-                    'command', shortcut['command']
-                ], check=True)
-                
-                # Set name
-                subprocess.run([
-                    'gsettings', 'set',
-                    f'org.gnome.settings-daemon.plugins.media-keys.custom-keybinding:/org/gnome/settings-daemon/plugins/media-keys/custom-keybindings/lumonitor{i}/',
-                    'name', shortcut['name']
-                ], check=True)
-                
-                # Set binding
-                subprocess.run([
-                    'gsettings', 'set',
-                    f'org.gnome.settings-daemon.plugins.media-keys.custom-keybinding:/org/gnome/settings-daemon/plugins/media-keys/custom-keybindings/lumonitor{i}/',
-                    'binding', shortcut['binding']
-                ], check=True)
-                
-                print(f"✅ {shortcut['name']}: {shortcut['binding']}")
-                
-            except subprocess.CalledProcessError as e:
-                print(f"❌ Error setting up {shortcut['name']}: {e}")
-        
-        # Register the custom keybindings
         try:
-            current_bindings = subprocess.run([
-                'gsettings', 'get', 'org.gnome.settings-daemon.plugins.media-keys', 'custom-keybindings'
-            ], capture_output=True, text=True, check=True).stdout.strip()
-            
-            # Parse current bindings
-            if current_bindings == "@as []":
-                new_bindings = []
+            Gio = _load_gio()
+            if Gio is not None:
+                self._register_with_gio(Gio, shortcuts)
             else:
-                # Remove brackets and quotes, split by comma
-                current_bindings = current_bindings.strip("[]'\"")
-                new_bindings = [b.strip().strip("'\"") for b in current_bindings.split(",") if b.strip()]
-            
-            # Add our bindings
-            for i in range(len(shortcuts)):
-                binding_path = f'/org/gnome/settings-daemon/plugins/media-keys/custom-keybindings/lumonitor{i}/'
-                if binding_path not in new_bindings:
-                    new_bindings.append(binding_path)
-            
-            # Set new bindings list
-            bindings_str = "[" + ", ".join(f"'{b}'" for b in new_bindings) + "]"
-            subprocess.run([
-                'gsettings', 'set', 'org.gnome.settings-daemon.plugins.media-keys', 
-                'custom-keybindings', bindings_str
-            ], check=True)
+                self._register_with_dconf(shortcuts)
             
+            for shortcut in shortcuts:
+                print(f"✅ {shortcut['name']}: {shortcut['binding']}")
             print("✅ GNOME keyboard shortcuts registered")
             
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, FileNotFoundError, ValueError, SyntaxError) as e:
             print(f"❌ Error registering shortcuts: {e}")
     
+    def _register_with_gio(self, Gio, shortcuts: list):
+        """Write the shortcut keys in-process through Gio.Settings"""
+        media_keys = Gio.Settings.new(MEDIA_KEYS_SCHEMA)
+        bindings = list(media_keys.get_strv('custom-keybindings'))
+        for i, shortcut in enumerate(shortcuts):
+            binding_path = f'{MEDIA_KEYS_DIR}custom-keybindings/lumonitor{i}/'
+            keybinding = Gio.Settings.new_with_path(CUSTOM_KEYBINDING_SCHEMA, binding_path)
+            keybinding.set_string('name', shortcut['name'])
+            keybinding.set_string('command', shortcut['command'])
+            keybinding.set_string('binding', shortcut['binding'])
+            if binding_path not in bindings:
+                bindings.append(binding_path)
+        media_keys.set_strv('custom-keybindings', bindings)
+        # Settings are written asynchronously; flush before the process exits
+        Gio.Settings.sync()
+    
+    def _register_with_dconf(self, shortcuts: list):
+        """Write the shortcut keys with one dconf load when PyGObject is unavailable"""
+        current_bindings = subprocess.run(
+            ['dconf', 'read', f'{MEDIA_KEYS_DIR}custom-keybindings'],
+            capture_output=True, text=True, check=True).stdout.strip()
+        
+        new_bindings = _parse_string_list(current_bindings)
+        
+        # Add our bindings
+        for i in range(len(shortcuts)):
+            binding_path = f'{MEDIA_KEYS_DIR}custom-keybindings/lumonitor{i}/'
+            if binding_path not in new_bindings:
+                new_bindings.append(binding_path)
+        
+        # One keyfile for dconf instead of a gsettings process per key
+        payload = "[/]\ncustom-keybindings=[" + ", ".join(_gvariant_string(b) for b in new_bindings) + "]\n"
+        for i, shortcut in enumerate(shortcuts):
+            payload += (f"\n[custom-keybindings/lumonitor{i}]\n"
+                        f"name={_gvariant_string(shortcut['name'])}\n"
+                        f"command={_gvariant_string(shortcut['command'])}\n"
+                        f"binding={_gvariant_string(shortcut['binding'])}\n")
+        subprocess.run(['dconf', 'load', MEDIA_KEYS_DIR], input=payload.encode(),
+                       stdout=subprocess.DEVNULL, check=True)
+    
     def remove_gnome_shortcuts(self):
         """Remove GNOME keyboard shortcuts"""
         print("Removing GNOME keyboard shortcuts...")
         try:
-            current_bindings = subprocess.run([
-                'gsettings', 'get', 'org.gnome.settings-daemon.plugins.media-keys', 'custom-keybindings'
-            ], capture_output=True, text=True, check=True).stdout.strip()
+            current_bindings = subprocess.run(
+                ['dconf', 'read', f'{MEDIA_KEYS_DIR}custom-keybindings'],
+                capture_output=True, text=True, check=True).stdout.strip()
             
-            if current_bindings != "@as []":
-                current_bindings = current_bindings.strip("[]'\"")
-                new_bindings = []
-                for binding in current_bindings.split(","):
-                    binding = binding.strip().strip("'\"")
-                    if not binding.endswith('lumonitor0/') and not binding.endswith('lumonitor1/') and not binding.endswith('lumonitor2/'):
-                        new_bindings.append(binding)
-                
-                bindings_str = "[" + ", ".join(f"'{b}'" for b in new_bindings if b) + "]"
-                subprocess.run([
-                    'gsettings', 'set', 'org.gnome.settings-daemon.plugins.media-keys', 
-                    'custom-keybindings', bindings_str
-                ], check=True)
+            bindings = _parse_string_list(current_bindings)
+            if bindings:
+                new_bindings = [binding for binding in bindings
+                                if not binding.endswith(('lumonitor0/', 'lumonitor1/', 'lumonitor2/'))]
                 
-                print("✅ GNOME shortcuts removed")
+                # '@as' types the list for dconf when it ends up empty
+                bindings_str = "@as [" + ", ".join(_gvariant_string(b) for b in new_bindings if b) + "]"
+                subprocess.run(['dconf', 'write', f'{MEDIA_KEYS_DIR}custom-keybindings', bindings_str],
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True)
+            
+            # Drop the keys themselves, not just their registration
+            for i in range(3):
+                subprocess.run(['dconf', 'reset', '-f', f'{MEDIA_KEYS_DIR}custom-keybindings/lumonitor{i}/'],
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True)
+            
+            print("✅ GNOME shortcuts removed")
                 
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, FileNotFoundError, ValueError, SyntaxError) as e:
             print(f"❌ Error removing shortcuts: {e}")
 
 
@@ -3,9 +3,56 @@
 Simple test script to verify Lumonitor functionality
 """
 
-import subprocess
+import importlib.util
+import io
+import shutil
 import sys
 import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_LUMONITOR = None
+_LUMONITOR_LOCK = threading.Lock()
+
+
+def _load_lumonitor():
+    """Load lumonitor.py from next to this script once, without touching sys.path"""
+    global _LUMONITOR
+    with _LUMONITOR_LOCK:
+        if _LUMONITOR is None:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lumonitor.py')
+            spec = importlib.util.spec_from_file_location('lumonitor', path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _LUMONITOR = module
+    return _LUMONITOR
+
+
+class _ThreadLocalStdout:
+    """stdout stand-in that sends each thread's output to its own buffer"""
+    
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+    
+    def _target(self):
+        return getattr(self._local, 'buffer', self._default)
+    
+    def write(self, text):
+        return self._target().write(text)
+    
+    def flush(self):
+        self._target().flush()
+    
+    def capture(self, test):
+        """Run test with this thread's output captured, return (result, output)"""
+        self._local.buffer = io.StringIO()
+        try:
+            return test(), self._local.buffer.getvalue()
+        finally:
+            del self._local.buffer
 
 def test_dependencies():
     """Test if required dependencies are available"""
@@ -19,35 +66,40 @@ def test_dependencies():
         print(f"❌ Python error: {e}")
         return False
     
-    # Test xrandr
-    try:
-        result = subprocess.run(['xrandr', '--version'], capture_output=True, text=True)
-        if result.returncode == 0:
-            print("✅ xrandr available")
-        else:
-            print("❌ xrandr not working")
-            return False
-    except FileNotFoundError:
+    # Test xrandr (a PATH lookup, no need to start the binary)
+    if shutil.which('xrandr'):
+        print("✅ xrandr available")
+    else:
         print("❌ xrandr not found")
         return False
     
-    # Test GTK
+    # Test GTK and AppIndicator with one gi import
+    if importlib.util.find_spec('gi') is None:
+        print("❌ GTK error: PyGObject (gi) is not installed")
+        return False
     try:
         import gi
         gi.require_version('Gtk', '3.0')
+        try:
+            gi.require_version('AppIndicator3', '0.1')
+            indicator_error = None
+        except ValueError as e:
+            indicator_error = e
         from gi.repository import Gtk
         print("✅ GTK 3 available")
     except Exception as e:
         print(f"❌ GTK error: {e}")
         return False
     
-    # Test AppIndicator
-    try:
-        gi.require_version('AppIndicator3', '0.1')
-        from gi.repository import AppIndicator3
+    if indicator_error is None:
+        try:
+            from gi.repository import AppIndicator3
+        except Exception as e:
+            indicator_error = e
+    if indicator_error is None:
         print("✅ AppIndicator3 available")
-    except Exception as e:
-        print(f"⚠️ AppIndicator3 not available: {e}")
+    else:
+        print(f"⚠️ AppIndicator3 not available: {indicator_error}")
         print("   Tray functionality may not work")
     
     return True
@@ -57,12 +109,9 @@ def test_brightness_control():
     print("\n🔧 Testing brightness control...")
     
     try:
-        # Add current directory to Python path
-        sys.path.insert(0, os.path.dirname(__file__))
-        
-        from lumonitor import BrightnessController
+        lumonitor = _load_lumonitor()
         
-        controller = BrightnessController()
+        controller = lumonitor.BrightnessController()
         
         # Test monitor detection
         monitors = controller.get_monitors()
@@ -93,13 +142,12 @@ def test_gui():
     print("\n🎨 Testing GUI components...")
     
     try:
-        sys.path.insert(0, os.path.dirname(__file__))
-        from lumonitor import BrightnessController, LumonitorGUI
+        lumonitor = _load_lumonitor()
         
-        controller = BrightnessController()
+        controller = lumonitor.BrightnessController()
         
         # Test GUI creation (don't show)
-        gui = LumonitorGUI(controller)
+        gui = lumonitor.LumonitorGUI(controller)
         print("✅ GUI components created successfully")
         
         return True
@@ -108,22 +156,167 @@ def test_gui():
         print(f"❌ GUI error: {e}")
         return False
 
+def test_percent_steps():
+    """Test that every 1% brightness step counts as a change"""
+    print("\n🎚️ Testing 1% brightness steps...")
+    
+    try:
+        from brightness import _same_percent
+        
+        skipped = [percent for percent in range(10, 100)
+                   if _same_percent(percent / 100, (percent + 1) / 100)]
+        if skipped:
+            print(f"❌ Steps treated as no-ops: {skipped}")
+            return False
+        if not _same_percent(0.57, 0.5700001) or not _same_percent(0.1, 0.1):
+            print("❌ Equal levels treated as changes")
+            return False
+        print("✅ Each 1% step is written")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Brightness step error: {e}")
+        return False
+
+def test_parsers():
+    """Test the ddcutil/xrandr/dconf/daemon parsers against sample output"""
+    print("\n🧩 Testing output parsers...")
+    
+    try:
+        from brightness import _DDC_DISPLAY_RE, _I2C_BUS_RE, _LISTMONITORS_RE, _XRANDR_BRIGHTNESS_RE
+        from lumonitor_daemon import parse_command, parse_reply
+        from simple_hotkeys import _gvariant_string, _parse_string_list
+        
+        detect = (b"Display 1\n   I2C bus:  /dev/i2c-4\n   EDID synopsis:\n      Model:\n"
+                  b"      Serial number:        ABC\n\n"
+                  b"Display 2\n   I2C bus:  /dev/i2c-6\n   EDID synopsis:\n      Model:                LG HDR 4K  \n")
+        displays = [(m.group(1), _I2C_BUS_RE.search(m.group(2)).group(1), m.group(3))
+                    for m in _DDC_DISPLAY_RE.finditer(detect)]
+        assert displays == [(b'1', b'4', b''), (b'2', b'6', b'LG HDR 4K')], displays
+        
+        listmonitors = b"Monitors: 2\n 0: +*eDP-1 1920/344x1080/193+0+0  eDP-1\n 1: +HDMI-1 1920/527x1080/296+1920+0  HDMI-1\n"
+        assert _LISTMONITORS_RE.findall(listmonitors) == [b'eDP-1', b'HDMI-1']
+        
+        verbose = (b"eDP-1 connected primary 1920x1080+0+0\n\tIdentifier: 0x42\n\tBrightness: 0.80\n"
+                   b"DP-2 disconnected\nHDMI-1 connected 1920x1080+1920+0\n\tBrightness: 1.0\n")
+        assert _XRANDR_BRIGHTNESS_RE.findall(verbose) == [(b'eDP-1', b'0.80'), (b'HDMI-1', b'1.0')]
+        
+        path = "/org/gnome/settings-daemon/plugins/media-keys/custom-keybindings/it's/"
+        assert _parse_string_list("['" + path.replace("'", "\\'") + "', '/b/']") == [path, '/b/']
+        assert _parse_string_list(f"[{_gvariant_string(path)}]") == [path]
+        assert _parse_string_list("@as []") == [] and _parse_string_list("") == []
+        try:
+            _parse_string_list("['unterminated")
+            raise AssertionError("malformed dconf list was accepted")
+        except (ValueError, SyntaxError):
+            pass
+        
+        assert parse_command(['set', '0.5']) == ('set', 0.5, None)
+        assert parse_command(['step', '-0.1', 'HDMI-1']) == ('step', -0.1, 'HDMI-1')
+        assert parse_command(['reset', 'HDMI-1']) == ('reset', None, 'HDMI-1')
+        for bad in ([], ['reset', 'A', 'B'], ['step'], ['set', 'abc'], ['invalidate', 'A'], ['bogus']):
+            try:
+                parse_command(bad)
+                raise AssertionError(f"accepted {bad}")
+            except ValueError:
+                pass
+        assert parse_reply("ok eDP-1=50% HDMI-1=60%") == {'eDP-1': '50%', 'HDMI-1': '60%'}
+        print("✅ Parsers handle sample output")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Parser error: {e!r}")
+        return False
+
+def test_daemon_commands():
+    """Test set_brightness_many and the daemon protocol on a controller without hardware"""
+    print("\n📡 Testing daemon commands...")
+    
+    home = os.environ.get('HOME')
+    try:
+        from brightness import CACHE_FLUSH_INTERVAL, BrightnessController
+        from lumonitor_daemon import handle_command
+        
+        class RecordingController(BrightnessController):
+            """Two xrandr outputs whose brightness writes are only recorded"""
+            
+            def check_ddcutil_available(self):
+                return False
+            
+            def get_monitors(self):
+                return [{'name': name, 'display_name': name, 'ddcutil_id': None} for name in ('A', 'B')]
+            
+            def set_xrandr_brightness(self, monitor, brightness):
+                return self.set_xrandr_brightness_many({monitor: brightness})
+            
+            def set_xrandr_brightness_many(self, values):
+                self.runs = getattr(self, 'runs', []) + [dict(values)]
+                return True
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            # Cache files go to a scratch home instead of the user's
+            os.environ['HOME'] = tmp
+            batch = RecordingController()
+            results = batch.set_brightness_many({'A': 0.5, 'B': 0.5, 'NOPE': 0.5})
+            batch.close()
+            assert results == {'A': True, 'B': True, 'NOPE': False}, results
+            assert batch.runs == [{'A': 0.5, 'B': 0.5}], batch.runs
+            
+            controller = RecordingController()
+            assert handle_command(controller, "reset A") == "ok A=100%"
+            assert handle_command(controller, "step +0.1 B") == "ok B=60%"
+            assert handle_command(controller, "reset A B").startswith("error")
+            assert handle_command(controller, "set 0.4 NOPE").startswith("error")
+            
+            # Another process (the GUI or the plain CLI) changes B once the daemon's write is on disk
+            time.sleep(CACHE_FLUSH_INTERVAL * 3)
+            other = RecordingController()
+            other.set_brightness('B', 0.3)
+            other.close()
+            reply = handle_command(controller, "step +0.1 B")
+            assert reply == "ok B=40%", f"stale level used: {reply}"
+            controller.close()
+        print("✅ Daemon commands and batched writes behave")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Daemon command error: {e!r}")
+        return False
+    finally:
+        if home is None:
+            os.environ.pop('HOME', None)
+        else:
+            os.environ['HOME'] = home
+
 def main():
     """Run all tests"""
     print("🚀 Lumonitor Test Suite")
     print("=" * 40)
     
-    tests_passed = 0
-    total_tests = 3
-    
-    if test_dependencies():
-        tests_passed += 1
-    
-    if test_brightness_control():
-        tests_passed += 1
+    # The dependency probe overlaps the controller tests; those run one after
+    # another on the main thread, since two concurrent ddcutil detects would
+    # share the I2C buses and GTK objects have to be created there anyway
+    stdout = sys.stdout
+    proxy = sys.stdout = _ThreadLocalStdout(stdout)
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            dependencies = executor.submit(proxy.capture, test_dependencies)
+            results = [proxy.capture(test) for test in (test_brightness_control, test_gui, test_percent_steps,
+                                                        test_parsers, test_daemon_commands)]
+            results.insert(0, dependencies.result())
+    finally:
+        sys.stdout = stdout
     
-    if test_gui():
-        tests_passed += 1
+    # Report in the usual order regardless of which probe finished first
+    tests_passed = 0
+    total_tests = len(results)
+    for passed, output in results:
+        sys.stdout.write(output)
+        if passed:
+            tests_passed += 1
     
     print("\n" + "=" * 40)
     print(f"📊 Test Results: {tests_passed}/{total_tests} passed")